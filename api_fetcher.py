@@ -10,12 +10,17 @@ catch everything, then filter out retail.
 """
 
 import logging
-import time
 from typing import Generator
 
 import requests
 
+import circuit_breaker
+import http_client
+import metrics
 from config import JSEARCH_API_KEY
+from filters import FilterSpec
+from job import Job
+from sharding import ALL, Shard
 
 logger = logging.getLogger(__name__)
 
@@ -45,49 +50,52 @@ def _format_location(rj: dict) -> str:
     return ", ".join(p for p in parts if p)
 
 
-def fetch_jsearch_query(query: str) -> list[dict]:
-    """Run a single broad JSearch query."""
+def fetch_jsearch_query(query: str, spec: FilterSpec | None = None) -> Generator[Job, None, None]:
+    """
+    Run a single broad JSearch query, yielding jobs as they are read.
+    `spec` keywords are added to the query and its age picks date_posted.
+    """
+    spec = spec or FilterSpec.from_config()
     params = {
-        "query": query,
+        "query": spec.jsearch_query(query),
         "page": "1",
         "num_pages": "1",
-        "date_posted": "month",
+        "date_posted": spec.jsearch_date_posted(),
         "employment_types": "FULLTIME",
     }
     try:
-        resp = requests.get(
+        resp = http_client.get(
             JSEARCH_BASE_URL,
             headers=JSEARCH_HEADERS,
             params=params,
             timeout=15,
         )
         if resp.status_code == 429:
-            logger.warning("Rate limit hit - pausing 60s")
-            time.sleep(60)
-            return []
+            # circuit_breaker holds JSearch off for Retry-After from here
+            logger.warning("Rate limit hit for '%s'", query)
+            return
         resp.raise_for_status()
         data = resp.json()
     except requests.RequestException as exc:
         logger.warning("JSearch failed for '%s': %s", query, exc)
-        return []
+        return
 
-    results = []
     for rj in data.get("data", []):
         title = rj.get("job_title", "")
-        if _is_retail(title):
+        if _is_retail(title) or not spec.title_matches(title):
             continue
-        results.append({
-            "id": f"jsearch-{rj.get('job_id', '')}",
-            "title": title,
-            "company": rj.get("employer_name", ""),
-            "location": _format_location(rj),
-            "url": rj.get("job_apply_link") or rj.get("job_google_link", ""),
-            "source": "jsearch_api",
-            "posted_on": (rj.get("job_posted_at_datetime_utc") or "")[:10],
-        })
-
-    time.sleep(0.3)
-    return results
+        posted = (rj.get("job_posted_at_datetime_utc") or "")[:10]
+        if spec.too_old(posted):
+            continue
+        yield Job(
+            id=f"jsearch-{rj.get('job_id', '')}",
+            title=title,
+            company=rj.get("employer_name", ""),
+            location=_format_location(rj),
+            url=rj.get("job_apply_link") or rj.get("job_google_link", ""),
+            source="jsearch_api",
+            posted_on=posted,
+        )
 
 
 # =============================================================================
@@ -205,22 +213,29 @@ JSEARCH_QUERIES = [
 ]
 
 
-def fetch_all_api_jobs() -> Generator[dict, None, None]:
+def fetch_all_api_jobs(shard: Shard = ALL) -> Generator[Job, None, None]:
     if not JSEARCH_API_KEY:
         logger.warning("JSEARCH_API_KEY not set - skipping JSearch.")
         return
 
+    spec = FilterSpec.from_config()
     seen_ids: set = set()
-    total = len(JSEARCH_QUERIES)
-
-    for i, query in enumerate(JSEARCH_QUERIES, 1):
+    queries = [q for q in JSEARCH_QUERIES if shard.owns(f"jsearch:{q}")]
+    total = len(queries)
+
+    endpoint = http_client.endpoint_key(JSEARCH_BASE_URL)
+    for i, query in enumerate(queries, 1):
+        if circuit_breaker.is_open(endpoint):
+            logger.warning(
+                "JSearch is rate limited or failing - skipping the remaining %d queries",
+                total - i + 1,
+            )
+            return
         logger.info("JSearch query %d/%d: '%s'", i, total, query)
-        jobs = fetch_jsearch_query(query)
         new = 0
-        for job in jobs:
-            if job["id"] not in seen_ids:
-                seen_ids.add(job["id"])
+        for job in metrics.stream(f"jsearch:{query}", fetch_jsearch_query(query, spec)):
+            if job.id not in seen_ids:
+                seen_ids.add(job.id)
                 new += 1
                 yield job
         logger.info("  -> %d new results", new)
-        time.sleep(0.2)
@@ -0,0 +1,519 @@
+"""
+benchmark.py — Offline benchmark for the whole pipeline.
+
+Starts a local HTTP stand-in for Workday, Greenhouse, SmartRecruiters, iCIMS,
+Lever, JSearch and TeamWork Online, points the shared HTTP session at it, and
+times every stage against a scratch database and jobs log:
+
+    brand      fetch_all_brand_jobs()
+    api        fetch_all_api_jobs()
+    teamwork   scrape_teamwork_online()
+    dedup      is_new_job / mark_job_seen for every fetched job
+    expiry     remove_expired_jobs()
+    dashboard  generate(load_jobs())
+
+Responses are synthetic by default; --fixtures DIR serves recorded bodies
+instead where a file exists for the requested host and path.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --jobs 500 --latency-ms 40 --json bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+import api_fetcher
+import brand_scrapers
+import check_expired
+import db
+import generate_dashboard
+import http_client
+import main
+import metrics
+import rate_limiter
+import scraper
+
+logger = logging.getLogger("benchmark")
+
+ORIGINAL_HOST_HEADER = "X-Bench-Host"
+
+TITLES = [
+    "Associate Brand Manager",
+    "Product Line Analyst",
+    "Marketing Coordinator",
+    "Retail Store Associate",
+    "Footwear Developer",
+    "Consumer Insights Analyst",
+    "Merchandising Assistant",
+]
+LOCATIONS = ["Portland, OR", "Boston, MA", "Amsterdam, NL", "London, UK", "Remote"]
+
+
+# =============================================================================
+# MOCK SERVER
+# =============================================================================
+
+class MockATS:
+    """Synthetic (or recorded) responses for every source we scrape."""
+
+    def __init__(self, jobs_per_board: int, teamwork_pages: int, latency: float,
+                 dead_ratio: float, fixtures: Path | None = None):
+        self.jobs_per_board = jobs_per_board
+        self.teamwork_pages = teamwork_pages
+        self.latency = latency
+        self.dead_every = int(1 / dead_ratio) if dead_ratio > 0 else 0
+        self.fixtures = fixtures
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def record(self, size: int):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    # ── helpers ──────────────────────────────────────────────────────────────
+
+    def _title(self, i: int) -> str:
+        return f"{TITLES[i % len(TITLES)]} {i}"
+
+    def _location(self, i: int) -> str:
+        return LOCATIONS[i % len(LOCATIONS)]
+
+    def _family(self, i: int) -> str:
+        return "fam-retail" if "Retail" in self._title(i) else "fam-corporate"
+
+    def _updated(self, i: int) -> str:
+        """Spread over the last four weeks, so MAX_AGE_DAYS keeps them all."""
+        return time.strftime("%Y-%m-%dT00:00:00Z", time.gmtime(time.time() - (i % 28) * 86400))
+
+    def _matching(self, term: str) -> list[int]:
+        """Board indices a keyword search returns (all of them without one)."""
+        term = term.lower()
+        return [i for i in range(self.jobs_per_board) if term in self._title(i).lower()]
+
+    def fixture(self, host: str, path: str) -> bytes | None:
+        if not self.fixtures:
+            return None
+        name = path.strip("/").replace("/", "_") or "index"
+        for candidate in sorted((self.fixtures / host).glob(name + ".*")):
+            return candidate.read_bytes()
+        return None
+
+    # ── sources ──────────────────────────────────────────────────────────────
+
+    def workday(self, tenant: str, site: str, body: dict) -> dict:
+        offset, limit = body.get("offset", 0), body.get("limit", 20)
+        matching = self._matching(body.get("searchText", ""))
+        families = body.get("appliedFacets", {}).get("jobFamilyGroup")
+        if families:
+            matching = [i for i in matching if self._family(i) in families]
+        postings = [
+            {
+                "title": self._title(i),
+                "externalPath": f"/job/{site}/{tenant}_R{i:06d}",
+                "locationsText": self._location(i),
+                "postedOn": f"Posted {i % 28} Days Ago",
+            }
+            for i in matching[offset:offset + limit]
+        ]
+        facets = [{
+            "facetParameter": "jobFamilyGroup",
+            "descriptor": "Job Category",
+            "values": [
+                {"descriptor": "Retail Stores", "id": "fam-retail"},
+                {"descriptor": "Corporate", "id": "fam-corporate"},
+            ],
+        }]
+        return {"total": len(matching), "jobPostings": postings, "facets": facets}
+
+    def greenhouse(self, token: str) -> dict:
+        return {
+            "jobs": [
+                {
+                    "id": i,
+                    "title": self._title(i),
+                    "updated_at": self._updated(i),
+                    "location": {"name": self._location(i)},
+                    "absolute_url": f"https://boards.greenhouse.io/{token}/jobs/{i}",
+                    "departments": [{"name": "Marketing"}],
+                    "content": "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>",
+                }
+                for i in range(self.jobs_per_board)
+            ]
+        }
+
+    def smartrecruiters(self, company_id: str, offset: int, limit: int, q: str = "") -> dict:
+        matching = self._matching(q)
+        content = [
+            {
+                "id": str(i),
+                "name": self._title(i),
+                "department": {"label": "Product"},
+                "location": {"city": "Boston", "country": "us"},
+                "ref": f"https://api.smartrecruiters.com/v1/companies/{company_id}/postings/{i}",
+                "updatedOn": self._updated(i),
+            }
+            for i in matching[offset:offset + limit]
+        ]
+        return {"totalFound": len(matching), "content": content}
+
+    def lever(self, company_id: str) -> list:
+        return [
+            {
+                "id": f"{company_id}-{i}",
+                "text": self._title(i),
+                "categories": {"department": "Design", "location": self._location(i)},
+                "hostedUrl": f"https://jobs.lever.co/{company_id}/{i}",
+            }
+            for i in range(self.jobs_per_board)
+        ]
+
+    def jsearch(self, query: str) -> dict:
+        seed = sum(map(ord, query))
+        return {
+            "data": [
+                {
+                    "job_id": f"{seed}-{i}",
+                    "job_title": self._title(i),
+                    "employer_name": query.split(" jobs")[0],
+                    "job_city": "New York",
+                    "job_state": "NY",
+                    "job_country": "US",
+                    "job_apply_link": f"https://jobs.example.com/{seed}/{i}",
+                    "job_posted_at_datetime_utc": self._updated(i),
+                }
+                for i in range(10)
+            ]
+        }
+
+    def icims(self, host: str) -> str:
+        cards = "".join(
+            f'<div class="iCIMS_JobsTable_ListItem row">'
+            f'<div class="col"><h2>{self._title(i)}</h2>'
+            f'<a href="/jobs/{i}/job">View</a></div>'
+            f'<div class="col iCIMS_JobHeaderTag location">{self._location(i)}</div>'
+            f'</div>'
+            for i in range(self.jobs_per_board)
+        )
+        return f"<html><body><div class='iCIMS_JobsTable'>{cards}</div></body></html>"
+
+    def teamwork(self, page: int) -> str:
+        if page > self.teamwork_pages:
+            return "<html><body><p>No results</p></body></html>"
+        per_page = 25
+        cards = "".join(
+            f'<li class="organization-portal__job job-listing">'
+            f'<h3><a href="/jobs/{page}-{i}">{self._title(i)}</a></h3>'
+            f'<span class="organization-portal__job-company">Team {i % 40}</span>'
+            f'<span class="organization-portal__job-location">{self._location(i)}</span>'
+            f'</li>'
+            for i in range(page * per_page, (page + 1) * per_page)
+        )
+        nav = "<nav>" + "<a href='#'>x</a>" * 200 + "</nav>"
+        return f"<html><body>{nav}<ul>{cards}</ul></body></html>"
+
+    def _dead(self, path: str) -> bool:
+        digits = "".join(ch for ch in path if ch.isdigit())
+        return bool(self.dead_every and digits and int(digits[-6:]) % self.dead_every == 0)
+
+    def job_page(self, path: str) -> tuple[int, str]:
+        if self._dead(path):
+            return 404, "<html><body>Not found</body></html>"
+        return 200, "<html><body>" + "<p>Job description.</p>" * 500 + "</body></html>"
+
+    def job_detail(self, path: str) -> tuple[int, dict]:
+        """Per-job JSON from an ATS API (liveness probes)."""
+        if self._dead(path):
+            return 404, {"error": "not found"}
+        return 200, {"id": path.rsplit("/", 1)[-1], "content": "Job description. " * 100}
+
+
+def _make_handler(ats: MockATS):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body, content_type: str):
+            if not isinstance(body, (bytes, str)):
+                body = json.dumps(body)
+                content_type = "application/json"
+            if isinstance(body, str):
+                body = body.encode()
+            if ats.latency:
+                time.sleep(ats.latency)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command == "HEAD":
+                body = b""
+            self.wfile.write(body)
+            ats.record(len(body))
+
+        def _route(self, body: dict):
+            host = self.headers.get(ORIGINAL_HOST_HEADER, "")
+            parts = urlsplit(self.path)
+            path, query = parts.path, parse_qs(parts.query)
+            segments = path.strip("/").split("/")
+
+            recorded = ats.fixture(host, path)
+            if recorded is not None:
+                return self._send(200, recorded, "application/json")
+
+            is_detail = (
+                (path.startswith("/wday/cxs/") and "/job/" in path)
+                or (path.startswith("/v1/boards/") and len(segments) == 5)
+                or (host.startswith("api.lever.co") and len(segments) == 4)
+                or (host.startswith("api.smartrecruiters.com") and "/postings/" in path)
+            )
+            if is_detail:
+                status, detail = ats.job_detail(path)
+                return self._send(status, detail, "")
+            if path.startswith("/wday/cxs/") and path.endswith("/jobs"):
+                return self._send(200, ats.workday(segments[2], segments[3], body), "")
+            if host.startswith("api.greenhouse.io") or path.startswith("/v1/boards/"):
+                return self._send(200, ats.greenhouse(segments[2]), "")
+            if host.startswith("api.smartrecruiters.com") and path.endswith("/postings"):
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", ["100"])[0])
+                q = query.get("q", [""])[0]
+                return self._send(200, ats.smartrecruiters(segments[2], offset, limit, q), "")
+            if host.startswith("api.lever.co"):
+                return self._send(200, ats.lever(segments[2]), "")
+            if host.startswith("jsearch."):
+                return self._send(200, ats.jsearch(query.get("query", [""])[0]), "")
+            if ".icims.com" in host and path == "/jobs/search":
+                return self._send(200, ats.icims(host), "text/html")
+            if "teamworkonline.com" in host and path == "/jobs-in-sports":
+                page = int(query.get("page", ["1"])[0])
+                return self._send(200, ats.teamwork(page), "text/html")
+
+            status, html = ats.job_page(path)
+            return self._send(status, html, "text/html")
+
+        def do_GET(self):
+            self._route({})
+
+        def do_HEAD(self):
+            self._route({})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            self._route(json.loads(raw) if raw else {})
+
+    return Handler
+
+
+class _MockAdapter(HTTPAdapter):
+    """Send every request to the local server, remembering the real host."""
+
+    def __init__(self, base: str):
+        super().__init__(pool_maxsize=16)
+        self.base = urlsplit(base)
+
+    def send(self, request, **kwargs):
+        original = urlsplit(request.url)
+        request.headers[ORIGINAL_HOST_HEADER] = original.netloc
+        request.url = urlunsplit(
+            (self.base.scheme, self.base.netloc, original.path, original.query, "")
+        )
+        resp = super().send(request, **kwargs)
+        # Callers compare the final URL against the one they asked for
+        resp.url = urlunsplit(
+            (original.scheme, original.netloc, original.path, original.query, "")
+        )
+        return resp
+
+
+# =============================================================================
+# HARNESS
+# =============================================================================
+
+def _point_at_scratch_dir(workdir: Path):
+    db.DB_PATH = workdir / "jobs_seen.db"
+    main.JOBS_LOG = workdir / "all_jobs.json"
+    check_expired.JOBS_LOG = workdir / "all_jobs.json"
+    generate_dashboard.JOBS_LOG = workdir / "all_jobs.json"
+    generate_dashboard.OUTPUT = workdir / "dashboard.html"
+    api_fetcher.JSEARCH_API_KEY = "benchmark"
+
+
+def _measure(name: str, ats: MockATS, fn) -> dict:
+    requests_before, bytes_before = ats.requests, ats.bytes_sent
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    items = fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    result = {
+        "stage": name,
+        "items": items,
+        "wall_s": round(wall, 4),
+        "items_per_s": round(items / wall, 1) if wall else 0.0,
+        "requests": ats.requests - requests_before,
+        "bytes": ats.bytes_sent - bytes_before,
+        "peak_mem_mb": round(peak / 1e6, 2),
+    }
+    logger.info(
+        "%-10s %6d items  %8.3fs  %9.1f items/s  %5d req  %7.2f MB peak",
+        name, items, wall, result["items_per_s"], result["requests"], result["peak_mem_mb"],
+    )
+    return result
+
+
+def run_benchmark(args) -> dict:
+    ats = MockATS(
+        jobs_per_board=args.jobs,
+        teamwork_pages=args.teamwork_pages,
+        latency=args.latency_ms / 1000,
+        dead_ratio=args.dead_ratio,
+        fixtures=Path(args.fixtures) if args.fixtures else None,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(ats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    adapter = _MockAdapter(base)
+    http_client.session.mount("https://", adapter)
+    http_client.session.mount("http://", adapter)
+    if args.no_sleep:
+        rate_limiter.set_enabled(False)
+
+    stages = []
+    fetched = []
+    with tempfile.TemporaryDirectory() as tmp:
+        _point_at_scratch_dir(Path(tmp))
+        db.init_db()
+        metrics.reset()
+        tracemalloc.start()
+        total_start = time.perf_counter()
+
+        def collect(source):
+            jobs = list(source)
+            fetched.extend(jobs)
+            return len(jobs)
+
+        stages.append(_measure("brand", ats, lambda: collect(brand_scrapers.fetch_all_brand_jobs())))
+        stages.append(_measure("api", ats, lambda: collect(api_fetcher.fetch_all_api_jobs())))
+        stages.append(_measure(
+            "teamwork", ats,
+            lambda: collect(scraper.scrape_teamwork_online(max_pages=args.teamwork_pages + 1)),
+        ))
+
+        def dedup():
+            new_jobs = []
+            for job in fetched:
+                if db.is_new_job(job.id):
+                    db.mark_job_seen(job)
+                    new_jobs.append(job)
+            main.save_jobs(new_jobs)
+            return len(fetched)
+
+        stages.append(_measure("dedup", ats, dedup))
+        stages.append(_measure("expiry", ats, lambda: len(fetched) - check_expired.remove_expired_jobs()))
+        stages.append(_measure(
+            "dashboard", ats,
+            lambda: generate_dashboard.generate(generate_dashboard.load_jobs()) or len(fetched),
+        ))
+
+        total_wall = time.perf_counter() - total_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    server.shutdown()
+    report = {
+        "config": {
+            "jobs_per_board": args.jobs,
+            "teamwork_pages": args.teamwork_pages,
+            "latency_ms": args.latency_ms,
+            "dead_ratio": args.dead_ratio,
+            "no_sleep": args.no_sleep,
+        },
+        "stages": stages,
+        "total": {
+            "wall_s": round(total_wall, 4),
+            "jobs": len(fetched),
+            "jobs_per_s": round(len(fetched) / total_wall, 1) if total_wall else 0.0,
+            "requests": ats.requests,
+            "bytes": ats.bytes_sent,
+            "peak_mem_mb": round(peak / 1e6, 2),
+        },
+        "metrics": metrics.snapshot(),
+    }
+    logger.info(
+        "TOTAL      %6d jobs   %8.3fs  %9.1f jobs/s   %5d req  %7.2f MB peak",
+        len(fetched), total_wall, report["total"]["jobs_per_s"], ats.requests,
+        report["total"]["peak_mem_mb"],
+    )
+    return report
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a message for every stage that got slower than `tolerance` allows."""
+    previous = {s["stage"]: s for s in baseline.get("stages", [])}
+    regressions = []
+    for stage in report["stages"]:
+        before = previous.get(stage["stage"])
+        if not before or not before["wall_s"]:
+            continue
+        ratio = stage["wall_s"] / before["wall_s"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                "%s: %.3fs -> %.3fs (%.0f%% slower)"
+                % (stage["stage"], before["wall_s"], stage["wall_s"], (ratio - 1) * 100)
+            )
+    return regressions
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=200, help="postings per ATS board")
+    parser.add_argument("--teamwork-pages", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added server latency per response")
+    parser.add_argument("--dead-ratio", type=float, default=0.1, help="share of job URLs that 404")
+    parser.add_argument("--fixtures", help="directory of recorded responses: <host>/<path_with_underscores>.*")
+    parser.add_argument("--no-sleep", action="store_true", help="disable per-host rate limiting")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(name)s - %(message)s")
+    for noisy in ("brand_scrapers", "api_fetcher", "scraper", "check_expired"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    report = run_benchmark(args)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        logger.info("Report written to %s", args.json)
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            logger.error("REGRESSION  %s", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,90 @@
+"""
+bloom.py — Bloom filter of seen job IDs.
+
+Sits in front of the seen_jobs table (see db.py). "Not in the filter" means
+the job is definitely new and no SQLite lookup is needed. "In the filter"
+only means probably seen, so db.py falls back to an exact check.
+
+Keys are the 64-bit ID hashes from db.id_hash rather than the ID strings,
+so the filter can be rebuilt from compacted rows that only keep the hash.
+
+The filter is saved next to jobs_seen.db as a small binary file. The header
+records how many seen IDs the DB held when the file was written. If that no
+longer matches (a different DB was restored, retention pruned rows, the file
+is missing or from an older layout), the filter is rebuilt from the DB.
+"""
+
+import math
+import struct
+from pathlib import Path
+
+MAGIC = b"JTB2"
+# magic, bit count, hash count, capacity, rows covered
+_HEADER = struct.Struct("<4sQIQQ")
+
+DEFAULT_ERROR_RATE = 0.001
+MIN_CAPACITY = 100_000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = max(int(capacity), 1)
+        self.bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: int):
+        # Double hashing on the two 32-bit halves of the key
+        h1 = key & 0xFFFFFFFF
+        h2 = ((key >> 32) & 0xFFFFFFFF) | 1
+        bits = self.bits
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % bits
+
+    def add(self, key: int):
+        array = self.array
+        for pos in self._positions(key):
+            array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        array = self.array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def full(self) -> bool:
+        """True once more keys were added than it was sized for."""
+        return self.count > self.capacity
+
+    def save(self, path: Path, rows: int):
+        """Write the filter, recording that it covers `rows` table rows."""
+        tmp = Path(path).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, self.bits, self.hashes, self.capacity, rows))
+            f.write(self.array)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple["BloomFilter", int] | None:
+        """(filter, rows covered) from `path`, or None if missing or unreadable."""
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, bits, hashes, capacity, rows = _HEADER.unpack_from(data)
+        body = data[_HEADER.size:]
+        if magic != MAGIC or len(body) != (bits + 7) // 8:
+            return None
+        bf = cls.__new__(cls)
+        bf.capacity, bf.bits, bf.hashes = capacity, bits, hashes
+        bf.array = bytearray(body)
+        bf.count = rows
+        return bf, rows
+
+
+def sized_for(rows: int) -> BloomFilter:
+    """A fresh filter with room for the table to double before a rebuild."""
+    return BloomFilter(max(MIN_CAPACITY, rows * 2))
@@ -14,15 +14,35 @@ ATS systems:
 - SmartRecruiters: ASICS, Brooks Running, Salomon, Burton, Gymshark
 - iCIMS:          Wilson, New Era, Fabletics
 - Lever:          Birkenstock, WHOOP
+
+Workday, Greenhouse and SmartRecruiters boards are read in delta mode by
+default: each board keeps a high-water mark (the newest posting date seen)
+and paging stops at the first page that is entirely older than it.
+
+Workday searches also send appliedFacets that leave out each tenant's
+retail / hourly job families, so store postings are never downloaded.
+
+JOB_KEYWORDS / MAX_AGE_DAYS (filters.FilterSpec) are sent as search
+parameters where the ATS takes them, and checked on the raw posting
+everywhere else.
 """
 
 import logging
 import re
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from typing import Generator
 
-import requests
-from bs4 import BeautifulSoup
+import db
+import html_parsing
+import http_client
+import metrics
+import parse_pool
+from config import FETCH_MODE, WORKDAY_FACET_TTL_DAYS
+from db import stable_hash
+from filters import FilterSpec
+from job import Job
+from sharding import ALL, Shard
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +71,49 @@ def _is_retail(title: str, extra: str = "") -> bool:
     return any(kw in combined for kw in RETAIL_EXCLUDE)
 
 
+# ── Posting dates ─────────────────────────────────────────────────────────────
+# Watermarks are UTC dates (YYYY-MM-DD) because Workday only gives day
+# granularity. A posting dated on the watermark day itself is still read,
+# so the windows of consecutive runs overlap by a day and dedup drops the
+# repeats.
+
+_WORKDAY_POSTED_RE = re.compile(r"posted\s+(today|yesterday|(\d+)\+?\s+days?\s+ago)", re.I)
+
+
+def _workday_date(posted_on: str, today: date | None = None) -> str:
+    """
+    "Posted Today" / "Posted Yesterday" / "Posted 3 Days Ago" / "Posted
+    30+ Days Ago" -> ISO date. "" when the text isn't recognised.
+    """
+    m = _WORKDAY_POSTED_RE.search(posted_on or "")
+    if not m:
+        return ""
+    today = today or datetime.now(timezone.utc).date()
+    word = m.group(1).lower()
+    days = 0 if word == "today" else 1 if word == "yesterday" else int(m.group(2))
+    return (today - timedelta(days=days)).isoformat()
+
+
+def _iso_date(timestamp: str) -> str:
+    """ISO timestamp with any offset -> UTC date."""
+    if not timestamp:
+        return ""
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return timestamp[:10]
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date().isoformat()
+
+
+def _epoch_ms_date(ms) -> str:
+    """Milliseconds since the epoch (Lever's createdAt) -> UTC date."""
+    if not isinstance(ms, (int, float)):
+        return ""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).date().isoformat()
+
+
 # =============================================================================
 # WORKDAY
 # =============================================================================
@@ -77,60 +140,185 @@ WORKDAY_COMPANIES = {
 }
 
 
-def scrape_workday(company_name: str, tenant: str, site: str) -> list[dict]:
+# ── Facets ────────────────────────────────────────────────────────────────────
+# appliedFacets can only include values, so retail is excluded by sending
+# every other value of each facet that has a retail one. Location facets
+# are left alone. A value the tenant adds is only sent once the cached
+# list is refreshed; postings in it may be older than the board's watermark
+# by then, so a changed list resets the watermark and the board is read in
+# full.
+
+RETAIL_FACET_VALUES = [
+    "retail", "store", "distribution", "warehouse", "fulfillment",
+    "part time", "part-time", "seasonal", "hourly", "temporary", "outlet",
+]
+
+
+def _facet_values(facets: list):
+    """(facetParameter, id, descriptor) for every value, nested groups included."""
+    for facet in facets or []:
+        param = facet.get("facetParameter", "")
+        for value in facet.get("values", []):
+            if "facetParameter" in value:
+                yield from _facet_values([value])
+            elif value.get("id"):
+                yield param, value["id"], value.get("descriptor", "")
+
+
+def _retail_free_facets(facets: list) -> dict:
+    """appliedFacets that keep every non-retail value. {} if nothing to exclude."""
+    by_param: dict = {}
+    for param, value_id, descriptor in _facet_values(facets):
+        if "location" in param.lower() or "country" in param.lower():
+            continue
+        by_param.setdefault(param, []).append((value_id, descriptor.lower()))
+
+    applied = {}
+    for param, values in by_param.items():
+        keep = [
+            value_id for value_id, descriptor in values
+            if not any(kw in descriptor for kw in RETAIL_FACET_VALUES)
+        ]
+        if keep and len(keep) < len(values):
+            applied[param] = keep
+    return applied
+
+
+def _workday_facets(company_name: str, board: str, url: str) -> tuple[dict, bool]:
+    """
+    Cached appliedFacets for a board, looked up from Workday when stale.
+    Also returns True if a lookup found values different from the cached ones.
+    """
+    cached = db.get_workday_facets(board, WORKDAY_FACET_TTL_DAYS)
+    if cached is not None:
+        return cached, False
+    payload = {"limit": 1, "offset": 0, "searchText": "", "appliedFacets": {}}
+    try:
+        resp = http_client.post(url, json=payload, headers=HEADERS, timeout=15)
+        if resp.status_code not in (200, 201):
+            logger.warning(
+                "Workday %s facets: HTTP %s", company_name, resp.status_code
+            )
+            return {}, False
+        facets = resp.json().get("facets", [])
+    except Exception as exc:
+        logger.warning("Workday %s facets: %s", company_name, exc)
+        return {}, False
+
+    applied = _retail_free_facets(facets)
+    changed = db.set_workday_facets(board, applied)
+    if changed:
+        logger.info("  Workday %s: facet values changed, reading the board in full", company_name)
+        db.clear_watermark(f"workday:{board}")
+    if applied:
+        logger.info(
+            "  Workday %s: excluding retail via %s", company_name, ", ".join(sorted(applied))
+        )
+    return applied, changed
+
+
+def scrape_workday(company_name: str, tenant: str, site: str, since: str = "",
+                   spec: FilterSpec | None = None) -> Generator[Job, None, str]:
+    """
+    All non-retail postings on a Workday board that match `spec`, newest first.
+    Retail job families are filtered out server-side via appliedFacets, and
+    each keyword is sent as its own searchText query.
+    With `since` (an ISO date), postings older than it are skipped and an
+    unfiltered listing stops paging at the first page with nothing on or
+    after it.
+    Yields jobs as each page is parsed, then returns the newest posting
+    date — "" if paging failed.
+    """
+    spec = spec or FilterSpec.from_config()
     url = (
         f"https://{tenant}.wd1.myworkdayjobs.com"
         f"/wday/cxs/{tenant}/{site}/jobs"
     )
-    payload = {"limit": 20, "offset": 0, "searchText": ""}
-    jobs = []
-    offset = 0
-
-    while True:
-        payload["offset"] = offset
-        try:
-            resp = requests.post(url, json=payload, headers=HEADERS, timeout=15)
-            if resp.status_code not in (200, 201):
-                logger.warning(
-                    "Workday %s: HTTP %s", company_name, resp.status_code
+    board = f"{tenant}/{site}"
+    applied, changed = _workday_facets(company_name, board, url)
+    if changed:
+        # Postings in newly sent values may predate the watermark
+        since = ""
+    since = max(since, spec.since)
+    count = 0
+    pages = 0
+    newest = ""
+    seen = set()
+
+    def search(term):
+        """Jobs for one searchText. Returns False if paging failed."""
+        nonlocal count, pages, newest
+        payload = {"limit": 20, "offset": 0, "searchText": term, "appliedFacets": applied}
+        while True:
+            try:
+                resp = http_client.post(url, json=payload, headers=HEADERS, timeout=15)
+                if resp.status_code == 400 and applied:
+                    # Facet IDs went stale; look them up again next run
+                    logger.warning(
+                        "Workday %s: facets rejected, searching unfiltered", company_name
+                    )
+                    db.clear_workday_facets(board)
+                    applied.clear()
+                    metrics.record_retry(url)
+                    continue
+                if resp.status_code not in (200, 201):
+                    logger.warning(
+                        "Workday %s: HTTP %s", company_name, resp.status_code
+                    )
+                    return False
+                data = resp.json()
+            except Exception as exc:
+                logger.warning("Workday %s: %s", company_name, exc)
+                return False
+            pages += 1
+
+            postings = data.get("jobPostings", [])
+            if not postings:
+                return True
+
+            in_window = 0
+            for job in postings:
+                posted = _workday_date(job.get("postedOn", ""))
+                newest = max(newest, posted)
+                if since and posted and posted < since:
+                    continue
+                in_window += 1
+                title = job.get("title", "")
+                if _is_retail(title) or not spec.title_matches(title):
+                    continue
+                path = job.get("externalPath", "")
+                if path in seen:
+                    continue
+                seen.add(path)
+                job_url = (
+                    f"https://{tenant}.wd1.myworkdayjobs.com"
+                    f"/en-US/{site}{path}"
                 )
-                break
-            data = resp.json()
-        except Exception as exc:
-            logger.warning("Workday %s: %s", company_name, exc)
-            break
-
-        postings = data.get("jobPostings", [])
-        if not postings:
-            break
-
-        for job in postings:
-            title = job.get("title", "")
-            if _is_retail(title):
-                continue
-            path = job.get("externalPath", "")
-            job_url = (
-                f"https://{tenant}.wd1.myworkdayjobs.com"
-                f"/en-US/{site}{path}"
-            )
-            jobs.append({
-                "id": f"wd-{tenant}-{site}-{hash(path)}",
-                "title": title,
-                "company": company_name,
-                "location": job.get("locationsText", ""),
-                "url": job_url,
-                "source": "brand_scraper",
-                "posted_on": job.get("postedOn", ""),
-            })
-
-        total = data.get("total", 0)
-        offset += 20
-        if offset >= total:
-            break
-        time.sleep(0.3)
-
-    logger.info("  Workday %s: %d jobs", company_name, len(jobs))
-    return jobs
+                yield Job(
+                    id=f"wd-{tenant}-{site}-{stable_hash(path)}",
+                    title=title,
+                    company=company_name,
+                    location=job.get("locationsText", ""),
+                    url=job_url,
+                    source="brand_scraper",
+                    posted_on=posted or job.get("postedOn", ""),
+                )
+                count += 1
+
+            payload["offset"] += 20
+            if payload["offset"] >= data.get("total", 0):
+                return True
+            # Keyword results come back by relevance, not date, so only an
+            # unfiltered listing can stop at the first page older than `since`
+            if since and not term and not in_window:
+                return True
+
+    complete = True
+    for term in spec.search_terms():
+        complete = (yield from search(term)) and complete
+
+    logger.info("  Workday %s: %d jobs (%d page(s))", company_name, count, pages)
+    return newest if complete else ""
 
 
 # =============================================================================
@@ -152,44 +340,61 @@ GREENHOUSE_COMPANIES = {
 }
 
 
-def scrape_greenhouse(company_name: str, board_token: str) -> list[dict]:
+def scrape_greenhouse(company_name: str, board_token: str, since: str = "",
+                      spec: FilterSpec | None = None) -> Generator[Job, None, str]:
+    """
+    All non-retail postings on a Greenhouse board that match `spec`. The
+    board comes back in one response with no search parameters, so `since`
+    and `spec` only skip postings.
+    Yields jobs, then returns the newest updated_at date.
+    """
+    spec = spec or FilterSpec.from_config()
+    since = max(since, spec.since)
     url = (
         f"https://api.greenhouse.io/v1/boards/{board_token}/jobs"
         f"?content=true"
     )
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        resp = http_client.get(url, headers=HEADERS, timeout=15)
         if resp.status_code != 200:
             logger.warning(
                 "Greenhouse %s: HTTP %s", company_name, resp.status_code
             )
-            return []
+            return ""
         data = resp.json()
     except Exception as exc:
         logger.warning("Greenhouse %s: %s", company_name, exc)
-        return []
+        return ""
 
-    jobs = []
+    count = 0
+    newest = ""
     for job in data.get("jobs", []):
+        updated = _iso_date(job.get("updated_at") or "")
+        newest = max(newest, updated)
+        if since and updated and updated < since:
+            continue
         title = job.get("title", "")
+        if not spec.title_matches(title):
+            continue
         dept = ""
         if job.get("departments"):
             dept = job["departments"][0].get("name", "")
         if _is_retail(title, dept):
             continue
         location = job.get("location", {}).get("name", "")
-        jobs.append({
-            "id": f"gh-{board_token}-{job.get('id', '')}",
-            "title": title,
-            "company": company_name,
-            "location": location,
-            "url": job.get("absolute_url", ""),
-            "source": "brand_scraper",
-            "posted_on": (job.get("updated_at") or "")[:10],
-        })
+        yield Job(
+            id=f"gh-{board_token}-{job.get('id', '')}",
+            title=title,
+            company=company_name,
+            location=location,
+            url=job.get("absolute_url", ""),
+            source="brand_scraper",
+            posted_on=updated,
+        )
+        count += 1
 
-    logger.info("  Greenhouse %s: %d jobs", company_name, len(jobs))
-    return jobs
+    logger.info("  Greenhouse %s: %d jobs", company_name, count)
+    return newest
 
 
 # =============================================================================
@@ -205,56 +410,92 @@ SMARTRECRUITERS_COMPANIES = {
 }
 
 
-def scrape_smartrecruiters(company_name: str, company_id: str) -> list[dict]:
+def scrape_smartrecruiters(company_name: str, company_id: str, since: str = "",
+                           spec: FilterSpec | None = None) -> Generator[Job, None, str]:
+    """
+    All non-retail postings for a SmartRecruiters company that match
+    `spec`. Each keyword is sent as its own `q` query. With `since`,
+    postings updated before it are skipped and an unfiltered listing stops
+    paging at the first page with nothing on or after it.
+    Yields jobs as each page is parsed, then returns the newest updatedOn
+    date — "" if paging failed.
+    """
+    spec = spec or FilterSpec.from_config()
+    since = max(since, spec.since)
     url = f"https://api.smartrecruiters.com/v1/companies/{company_id}/postings"
-    params = {"limit": 100, "offset": 0}
-    jobs = []
-
-    while True:
-        try:
-            resp = requests.get(url, params=params, headers=HEADERS, timeout=15)
-            if resp.status_code != 200:
-                logger.warning(
-                    "SmartRecruiters %s: HTTP %s", company_name, resp.status_code
+    count = 0
+    newest = ""
+    seen = set()
+
+    def search(term):
+        """Jobs for one `q`. Returns False if paging failed."""
+        nonlocal count, newest
+        params = {"limit": 100, "offset": 0}
+        if term:
+            params["q"] = term
+        while True:
+            try:
+                resp = http_client.get(url, params=params, headers=HEADERS, timeout=15)
+                if resp.status_code != 200:
+                    logger.warning(
+                        "SmartRecruiters %s: HTTP %s", company_name, resp.status_code
+                    )
+                    return False
+                data = resp.json()
+            except Exception as exc:
+                logger.warning("SmartRecruiters %s: %s", company_name, exc)
+                return False
+
+            postings = data.get("content", [])
+            if not postings:
+                return True
+
+            in_window = 0
+            for job in postings:
+                updated = _iso_date(job.get("updatedOn") or "")
+                newest = max(newest, updated)
+                if since and updated and updated < since:
+                    continue
+                in_window += 1
+                title = job.get("name", "")
+                if not spec.title_matches(title):
+                    continue
+                dept = ""
+                if job.get("department"):
+                    dept = job["department"].get("label", "")
+                if _is_retail(title, dept):
+                    continue
+                job_id = job.get("id", "")
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+                city = job.get("location", {}).get("city", "")
+                country = job.get("location", {}).get("country", "")
+                location = ", ".join(p for p in [city, country] if p)
+                yield Job(
+                    id=f"sr-{company_id}-{job_id}",
+                    title=title,
+                    company=company_name,
+                    location=location,
+                    url=job.get("ref", ""),
+                    source="brand_scraper",
+                    posted_on=updated,
                 )
-                break
-            data = resp.json()
-        except Exception as exc:
-            logger.warning("SmartRecruiters %s: %s", company_name, exc)
-            break
-
-        postings = data.get("content", [])
-        if not postings:
-            break
-
-        for job in postings:
-            title = job.get("name", "")
-            dept = ""
-            if job.get("department"):
-                dept = job["department"].get("label", "")
-            if _is_retail(title, dept):
-                continue
-            city = job.get("location", {}).get("city", "")
-            country = job.get("location", {}).get("country", "")
-            location = ", ".join(p for p in [city, country] if p)
-            jobs.append({
-                "id": f"sr-{company_id}-{job.get('id', '')}",
-                "title": title,
-                "company": company_name,
-                "location": location,
-                "url": job.get("ref", ""),
-                "source": "brand_scraper",
-                "posted_on": (job.get("updatedOn") or "")[:10],
-            })
-
-        total = data.get("totalFound", 0)
-        params["offset"] = params.get("offset", 0) + 100
-        if params["offset"] >= total:
-            break
-        time.sleep(0.3)
-
-    logger.info("  SmartRecruiters %s: %d jobs", company_name, len(jobs))
-    return jobs
+                count += 1
+
+            params["offset"] += 100
+            if params["offset"] >= data.get("totalFound", 0):
+                return True
+            # As with Workday, only an unfiltered listing is in date order
+            if since and not term and not in_window:
+                return True
+
+    complete = True
+    for term in spec.search_terms():
+        complete = (yield from search(term)) and complete
+
+    logger.info("  SmartRecruiters %s: %d jobs", company_name, count)
+    return newest if complete else ""
 
 
 # =============================================================================
@@ -268,13 +509,14 @@ ICIMS_COMPANIES = {
 }
 
 
-def scrape_icims(company_name: str, client_id: str) -> list[dict]:
+def _icims_cards(company_name: str, client_id: str) -> list[tuple] | None:
+    """Fetch an iCIMS search page and parse it in the parse pool. None on failure."""
     url = (
         f"https://careers-{client_id}.icims.com"
         f"/jobs/search?ss=1&searchRelation=keyword_all&in_iframe=1"
     )
     try:
-        resp = requests.get(
+        resp = http_client.get(
             url,
             headers={**HEADERS, "Accept": "text/html"},
             timeout=15,
@@ -283,42 +525,41 @@ def scrape_icims(company_name: str, client_id: str) -> list[dict]:
             logger.warning(
                 "iCIMS %s: HTTP %s", company_name, resp.status_code
             )
-            return []
-        soup = BeautifulSoup(resp.text, "html.parser")
+            return None
+        return parse_pool.parse(html_parsing.icims_cards, resp.text)
     except Exception as exc:
         logger.warning("iCIMS %s: %s", company_name, exc)
-        return []
+        return None
 
-    jobs = []
-    job_cards = soup.find_all(
-        "div", class_=re.compile(r"iCIMS_JobsTable_ListItem", re.I)
-    ) or soup.find_all("li", class_=re.compile(r"job", re.I))
 
-    for card in job_cards:
-        title_el = card.find(["h2", "h3", "a"])
-        if not title_el:
-            continue
-        title = title_el.get_text(strip=True)
-        if not title or _is_retail(title):
+def scrape_icims(company_name: str, client_id: str, spec: FilterSpec | None = None,
+                 cards: Future | None = None) -> Generator[Job, None, None]:
+    """
+    All non-retail postings on an iCIMS board that match `spec`. `cards`
+    is an _icims_cards() call already under way, to use instead of fetching.
+    """
+    spec = spec or FilterSpec.from_config()
+    cards = cards.result() if cards is not None else _icims_cards(company_name, client_id)
+    if cards is None:
+        return
+
+    count = 0
+    for title, job_url, location in cards:
+        if not title or _is_retail(title) or not spec.title_matches(title):
             continue
-        link = card.find("a", href=True)
-        job_url = link["href"] if link else ""
         if job_url and not job_url.startswith("http"):
             job_url = f"https://careers-{client_id}.icims.com{job_url}"
-        loc_el = card.find(class_=re.compile(r"location", re.I))
-        location = loc_el.get_text(strip=True) if loc_el else ""
-        jobs.append({
-            "id": f"icims-{client_id}-{abs(hash(job_url))}",
-            "title": title,
-            "company": company_name,
-            "location": location,
-            "url": job_url,
-            "source": "brand_scraper",
-            "posted_on": "",
-        })
-
-    logger.info("  iCIMS %s: %d jobs", company_name, len(jobs))
-    return jobs
+        yield Job(
+            id=f"icims-{client_id}-{stable_hash(job_url)}",
+            title=title,
+            company=company_name,
+            location=location,
+            url=job_url,
+            source="brand_scraper",
+        )
+        count += 1
+
+    logger.info("  iCIMS %s: %d jobs", company_name, count)
 
 
 # =============================================================================
@@ -331,79 +572,147 @@ LEVER_COMPANIES = {
 }
 
 
-def scrape_lever(company_name: str, company_id: str) -> list[dict]:
+def scrape_lever(company_name: str, company_id: str,
+                 spec: FilterSpec | None = None) -> Generator[Job, None, None]:
+    spec = spec or FilterSpec.from_config()
     url = f"https://api.lever.co/v0/postings/{company_id}?mode=json"
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        resp = http_client.get(url, headers=HEADERS, timeout=15)
         if resp.status_code != 200:
             logger.warning(
                 "Lever %s: HTTP %s", company_name, resp.status_code
             )
-            return []
+            return
         postings = resp.json()
     except Exception as exc:
         logger.warning("Lever %s: %s", company_name, exc)
-        return []
+        return
 
-    jobs = []
+    count = 0
     for job in postings:
         title = job.get("text", "")
+        if not spec.title_matches(title):
+            continue
+        if spec.too_old(_epoch_ms_date(job.get("createdAt"))):
+            continue
         dept = job.get("categories", {}).get("department", "")
         if _is_retail(title, dept):
             continue
         location = job.get("categories", {}).get("location", "")
-        jobs.append({
-            "id": f"lever-{company_id}-{job.get('id', '')}",
-            "title": title,
-            "company": company_name,
-            "location": location,
-            "url": job.get("hostedUrl", ""),
-            "source": "brand_scraper",
-            "posted_on": "",
-        })
+        yield Job(
+            id=f"lever-{company_id}-{job.get('id', '')}",
+            title=title,
+            company=company_name,
+            location=location,
+            url=job.get("hostedUrl", ""),
+            source="brand_scraper",
+        )
+        count += 1
 
-    logger.info("  Lever %s: %d jobs", company_name, len(jobs))
-    return jobs
+    logger.info("  Lever %s: %d jobs", company_name, count)
 
 
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
-def fetch_all_brand_jobs() -> Generator[dict, None, None]:
+def board_keys() -> list[str]:
+    """The key of every brand board, as fetch_all_brand_jobs() names them."""
+    return (
+        [f"workday:{tenant}/{site}" for tenant, site in WORKDAY_COMPANIES.values()]
+        + [f"greenhouse:{token}" for token in GREENHOUSE_COMPANIES.values()]
+        + [f"smartrecruiters:{company_id}" for company_id in SMARTRECRUITERS_COMPANIES.values()]
+        + [f"icims:{client_id}" for client_id in ICIMS_COMPANIES.values()]
+        + [f"lever:{company_id}" for company_id in LEVER_COMPANIES.values()]
+    )
+
+
+def fetch_all_brand_jobs(delta: bool = FETCH_MODE != "full",
+                         shard: Shard = ALL) -> Generator[Job, None, None]:
     """
-    Pull ALL jobs from top footwear brands directly from their ATS.
-    No keyword matching. Only retail jobs excluded.
+    Pull jobs from top footwear brands directly from their ATS.
+    Retail jobs are excluded; JOB_KEYWORDS / MAX_AGE_DAYS narrow the rest.
+
+    Jobs are yielded as soon as each page is parsed, so the caller can
+    dedup and notify while later pages and boards are still being fetched.
+
+    With `delta`, dated boards only return their window since the last run.
+    A board's mark is advanced only after its jobs have been consumed, so a
+    run that dies half-way re-reads the same window next time. Marks only
+    cover what the filter let through, so if the filter has changed since
+    the last run every board is read in full once.
+
+    With `shard`, only the boards that shard owns are read.
     """
+    spec = FilterSpec.from_config()
+    if delta and db.get_meta("brand_filter", spec.key()) != spec.key():
+        logger.info("Job filter changed since last run - reading every board in full")
+        delta = False
     seen_ids: set = set()
 
     def dedupe_yield(jobs):
-        for job in jobs:
-            if job["id"] not in seen_ids:
-                seen_ids.add(job["id"])
+        """Drop repeats across boards; passes on the scraper's return value."""
+        while True:
+            try:
+                job = next(jobs)
+            except StopIteration as stop:
+                return stop.value
+            if job.id not in seen_ids:
+                seen_ids.add(job.id)
                 yield job
 
+    def dated_board(board, label, scrape, *args):
+        if not shard.owns(board):
+            return
+        since = db.get_watermark(board) if delta else ""
+        newest = yield from dedupe_yield(metrics.stream(label, scrape(*args, since=since, spec=spec)))
+        if newest:
+            db.set_watermark(board, newest)
+
     logger.info("=== Phase 1: Workday brands ===")
     for company_name, (tenant, site) in WORKDAY_COMPANIES.items():
-        yield from dedupe_yield(scrape_workday(company_name, tenant, site))
-        time.sleep(0.5)
+        yield from dated_board(
+            f"workday:{tenant}/{site}", f"workday:{company_name}",
+            scrape_workday, company_name, tenant, site,
+        )
 
     logger.info("=== Phase 2: Greenhouse brands ===")
     for company_name, board_token in GREENHOUSE_COMPANIES.items():
-        yield from dedupe_yield(scrape_greenhouse(company_name, board_token))
-        time.sleep(0.3)
+        yield from dated_board(
+            f"greenhouse:{board_token}", f"greenhouse:{company_name}",
+            scrape_greenhouse, company_name, board_token,
+        )
 
     logger.info("=== Phase 3: SmartRecruiters brands ===")
     for company_name, company_id in SMARTRECRUITERS_COMPANIES.items():
-        yield from dedupe_yield(scrape_smartrecruiters(company_name, company_id))
-        time.sleep(0.3)
+        yield from dated_board(
+            f"smartrecruiters:{company_id}", f"smartrecruiters:{company_name}",
+            scrape_smartrecruiters, company_name, company_id,
+        )
 
     logger.info("=== Phase 4: iCIMS brands ===")
-    for company_name, client_id in ICIMS_COMPANIES.items():
-        yield from dedupe_yield(scrape_icims(company_name, client_id))
-        time.sleep(0.3)
+    # Every iCIMS client is its own host, so fetch and parse them all at once
+    icims = {
+        company_name: client_id for company_name, client_id in ICIMS_COMPANIES.items()
+        if shard.owns(f"icims:{client_id}")
+    }
+    with ThreadPoolExecutor(max_workers=max(1, len(icims))) as pool:
+        pages = {
+            company_name: pool.submit(_icims_cards, company_name, client_id)
+            for company_name, client_id in icims.items()
+        }
+        for company_name, client_id in icims.items():
+            yield from dedupe_yield(metrics.stream(
+                f"icims:{company_name}",
+                scrape_icims(company_name, client_id, spec, cards=pages[company_name]),
+            ))
 
     logger.info("=== Phase 5: Lever brands ===")
     for company_name, company_id in LEVER_COMPANIES.items():
-        yield from dedupe_yield(scrape_lever(company_name, company_id))
-        time.sleep(0.3)
+        if not shard.owns(f"lever:{company_id}"):
+            continue
+        yield from dedupe_yield(
+            metrics.stream(f"lever:{company_name}", scrape_lever(company_name, company_id, spec))
+        )
+
+    db.set_meta("brand_filter", spec.key())
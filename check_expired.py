@@ -1,122 +1,221 @@
 """
-check_expired.py — Checks each job URL and removes listings that are no longer active.
+check_expired.py — Checks job URLs and removes listings that are no longer active.
 
 Runs automatically as part of the GitHub Actions workflow before the dashboard
 is regenerated. Dead links (404s, redirects to homepage) are removed from
-all_jobs.json so they don't clutter your dashboard.
+all_jobs.json so they don't clutter your dashboard. How each job is checked
+is up to liveness.py.
+
+Each run checks at most EXPIRY_BUDGET jobs: the ones with the highest
+expiry_priority(), which grows with time since the job was last checked,
+its source's observed expiry rate and the posting's age. Outcomes are
+stored in jobs_seen.db (last_checked_at, check_status), so the cost per
+run stays flat however many jobs are on the dashboard.
+
+With --queue the scheduled checks go through the task queue (tasks.py) in
+batches, shared with any `main.py --worker` processes.
 """
 
-import json
+import argparse
+import heapq
 import logging
 import time
+from datetime import datetime, timezone
 from pathlib import Path
 
-import requests
+import circuit_breaker
+import jobs_log
+import liveness
+import metrics
+import profiling
+import tasks
+from config import EXPIRY_BUDGET
+from db import check_states, expiry_rates, init_db, mark_expired, record_checks
+from job import Job
 
 logger = logging.getLogger(__name__)
 
 JOBS_LOG = Path(__file__).parent / "all_jobs.json"
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-}
 
-# If a URL redirects to any of these, the job is gone
-DEAD_URL_SIGNALS = [
-    "/jobs",
-    "/careers",
-    "/search",
-    "?q=",
-    "no-longer",
-    "expired",
-    "not found",
-    "job-not-found",
-]
+def is_job_active(url: str) -> bool:
+    """True unless the job URL is definitely gone."""
+    return liveness.check_url(url) != "expired"
 
 
-def is_job_active(url: str) -> bool:
-    """
-    Return True if the job URL still appears to be a live posting.
-    Returns True on any error so we don't accidentally remove jobs
-    due to network issues.
-    """
-    if not url:
-        return True
+# ── Scheduling ────────────────────────────────────────────────────────────────
+
+# Expiry rate assumed for a source with no check history yet
+DEFAULT_EXPIRY_RATE = 0.1
+
+
+def _days_since(timestamp: str | None, now: float) -> float | None:
+    """Days from a stored UTC timestamp or ISO date to `now`. None if unparseable."""
+    if not timestamp:
+        return None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10, allow_redirects=True)
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if not dt.tzinfo:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - dt.timestamp()) / 86400)
 
-        # Hard 404 — job is definitely gone
-        if resp.status_code == 404:
-            return False
 
-        # If we got redirected to a generic search/careers page, job is gone
-        final_url = resp.url.lower()
-        if any(signal in final_url for signal in DEAD_URL_SIGNALS):
-            # Make sure the final URL is meaningfully different from the original
-            if len(final_url) < len(url) * 0.8:
-                return False
+def expiry_priority(job: Job, state: tuple | None, rates: dict, now: float) -> float:
+    """
+    How worthwhile checking `job` is this run:
 
-        return True
+        days since last check (or first seen)
+        x the source's expiry rate
+        x (0.5 + posting age in months, capped at 2)
 
-    except requests.RequestException:
-        # Network error — assume still active to be safe
-        return True
+    A job not in jobs_seen.db counts as unchecked for 30 days.
+    """
+    last_checked, seen_at = state or (None, None)
+    since_check = _days_since(last_checked or seen_at, now)
+    if since_check is None:
+        since_check = 30.0
+    age = _days_since(job.posted_on or seen_at, now) or 0.0
+    rate = rates.get(job.source, DEFAULT_EXPIRY_RATE)
+    return since_check * rate * (0.5 + min(age, 60.0) / 30)
 
 
-def remove_expired_jobs():
+def schedule_checks(budget: int = EXPIRY_BUDGET) -> set[str]:
+    """
+    IDs of the `budget` jobs in all_jobs.json most worth checking this run.
+    On equal priority, jobs never checked before go first.
     """
-    Load all_jobs.json, check each URL, remove expired ones, and save.
+    rates = expiry_rates()
+    now = time.time()
+
+    def scored():
+        batch = []
+        for job in jobs_log.iter_jobs(JOBS_LOG):
+            batch.append(job)
+            if len(batch) == 500:
+                yield from score(batch)
+                batch = []
+        yield from score(batch)
+
+    def score(batch):
+        states = check_states([job.id for job in batch])
+        for job in batch:
+            state = states.get(job.id)
+            never_checked = state is None or state[0] is None
+            yield expiry_priority(job, state, rates, now), never_checked, job.id
+
+    top = heapq.nlargest(budget, scored(), key=lambda p: (p[0], p[1]))
+    return {job_id for _, _, job_id in top}
+
+
+def remove_expired_jobs(budget: int = EXPIRY_BUDGET):
+    """
+    Stream all_jobs.json, check the URLs scheduled for this run (every URL
+    if `budget` is 0), and write back only the active jobs.
     Returns the number of jobs removed.
     """
     if not JOBS_LOG.exists():
         logger.info("No jobs log found — skipping expiration check.")
         return 0
 
-    with open(JOBS_LOG) as f:
-        jobs = json.load(f)
-
-    if not jobs:
-        return 0
-
-    logger.info("Checking %d jobs for expiration…", len(jobs))
+    due = schedule_checks(budget) if budget > 0 else None
+    logger.info(
+        "Checking %s jobs for expiration…", "all" if due is None else len(due)
+    )
 
-    active_jobs = []
-    removed = 0
+    results = []
+    expired_ids = []
+
+    def active_jobs():
+        for job in jobs_log.iter_jobs(JOBS_LOG):
+            if due is not None and job.id not in due:
+                yield job
+                continue
+            status = liveness.check(job)
+            results.append((job.id, status))
+            if status != "expired":
+                yield job
+                continue
+            expired_ids.append(job.id)
+            logger.info("  EXPIRED  [%s] %s @ %s", job.source, job.title, job.company)
+
+    active = jobs_log.write_jobs(JOBS_LOG, active_jobs())
+    record_checks(results)
+    mark_expired(expired_ids)
+    removed = len(expired_ids)
 
-    for i, job in enumerate(jobs):
-        url = job.get("url", "")
-        active = is_job_active(url)
+    logger.info(
+        "Expiration check complete: %d checked, %d active, %d removed.",
+        len(results),
+        active,
+        removed,
+    )
+    return removed
 
-        if active:
-            active_jobs.append(job)
-        else:
-            removed += 1
-            logger.info(
-                "  EXPIRED  [%s] %s @ %s",
-                job.get("source", ""),
-                job.get("title", ""),
-                job.get("company", ""),
-            )
 
-        # Be polite — don't hammer servers
-        if i % 10 == 0:
-            time.sleep(0.5)
+def remove_expired_queued(budget: int = EXPIRY_BUDGET):
+    """
+    remove_expired_jobs(), with the checks run as queued tasks by this
+    process and any workers. Returns the number of jobs removed.
+    """
+    if not JOBS_LOG.exists():
+        logger.info("No jobs log found — skipping expiration check.")
+        return 0
 
-    with open(JOBS_LOG, "w") as f:
-        json.dump(active_jobs, f, indent=2, default=str)
+    due = schedule_checks(budget) if budget > 0 else None
+    jobs = [job for job in jobs_log.iter_jobs(JOBS_LOG) if due is None or job.id in due]
+    with tasks.queued_run("expiry") as run_id:
+        queued = tasks.queue_expiry_checks(run_id, jobs)
+        logger.info("Queued %d jobs for expiration checks in %d task(s)…", len(jobs), queued)
+        tasks.work(run_id)
+        results = tasks.collect(run_id, "expiry")
+
+    checked = 0
+    expired_ids = set()
+    for result in results:
+        checked += len(result.get("checked", []))
+        expired_ids.update(result.get("expired", []))
+    active = jobs_log.write_jobs(
+        JOBS_LOG, (job for job in jobs_log.iter_jobs(JOBS_LOG) if job.id not in expired_ids)
+    )
 
     logger.info(
-        "Expiration check complete: %d active, %d removed.",
-        len(active_jobs),
-        removed,
+        "Expiration check complete: %d checked, %d active, %d removed.",
+        checked,
+        active,
+        len(expired_ids),
     )
-    return removed
+    return len(expired_ids)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove expired listings from all_jobs.json")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="profile the expiry check with cProfile + tracemalloc",
+    )
+    parser.add_argument(
+        "--profile-dir", type=Path, default=profiling.ARTIFACTS_DIR,
+        help="where --profile writes its reports (default: artifacts/profile)",
+    )
+    parser.add_argument(
+        "--budget", type=int, default=EXPIRY_BUDGET,
+        help=f"most job URLs to check this run, 0 = all (default: {EXPIRY_BUDGET})",
+    )
+    parser.add_argument(
+        "--queue", action="store_true",
+        help="check through the task queue, shared with `main.py --worker` processes",
+    )
+    args = parser.parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s")
-    remove_expired_jobs()
+    if args.profile:
+        profiling.enable(args.profile_dir)
+    init_db()
+    with metrics.phase("expiry"), profiling.phase("expiry"):
+        if args.queue:
+            remove_expired_queued(args.budget)
+        else:
+            remove_expired_jobs(args.budget)
+    circuit_breaker.flush()
+    metrics.write_report(JOBS_LOG.parent, name="expiry_report")
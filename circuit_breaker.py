@@ -0,0 +1,234 @@
+"""
+circuit_breaker.py — Per-endpoint circuit breaker and adaptive per-host delay.
+
+Every request made through http_client is reported here. An endpoint
+(host + path, e.g. one Workday career site or one Greenhouse board) that
+keeps failing — timeouts, connection errors, 5xx, 404/410 for a retired
+board — is "opened" and skipped for a cooldown period, so a dead source
+stops costing a full timeout on every run. Once the cooldown is over, one
+probe request is let through. If it succeeds the circuit closes. If it
+fails, the circuit reopens for twice as long.
+
+Alongside that, each host gets a politeness delay that grows on 429s and
+when responses get slow, and decays back towards zero while the host is
+healthy. rate_limiter enforces it as a minimum gap between requests.
+
+Endpoint state is kept in SQLite (see db.init_db) so it survives between
+runs. Changes to an endpoint's state are written immediately. Host delays
+are written by flush() at the end of a run.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures (across runs) before an endpoint is skipped
+FAILURE_THRESHOLD = 3
+BASE_COOLDOWN = 6 * 3600
+MAX_COOLDOWN = 7 * 24 * 3600
+
+# How long a half-open endpoint's probe may go unanswered before another
+# request is let through in its place (its thread died, say)
+PROBE_TIMEOUT = 120
+
+# 429 handling: default wait when the server doesn't send Retry-After
+DEFAULT_RETRY_AFTER = 60
+
+# Adaptive per-host delay
+MAX_HOST_DELAY = 30.0
+DELAY_DECAY = 0.8            # multiplier applied after each healthy response
+SLOW_LATENCY = 2.0           # seconds; slower than this and we back off
+LATENCY_EWMA_WEIGHT = 0.2
+
+_lock = threading.Lock()
+_endpoints: dict | None = None
+_hosts: dict = {}
+# endpoint -> when its half-open probe was let through (this process only)
+_probes: dict = {}
+
+
+def _load():
+    global _endpoints
+    if _endpoints is not None:
+        return
+    _endpoints = {}
+    try:
+        with db.get_connection() as conn:
+            for row in conn.execute("SELECT * FROM endpoint_health"):
+                _endpoints[row["endpoint"]] = dict(row)
+            for row in conn.execute("SELECT * FROM host_backoff"):
+                _hosts[row["host"]] = {
+                    "delay": row["delay"],
+                    "latency_ewma": row["latency_ewma"],
+                }
+    except sqlite3.OperationalError as exc:
+        logger.debug("Circuit breaker state not loaded: %s", exc)
+
+
+def _save_endpoint(state: dict):
+    try:
+        with db.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO endpoint_health
+                    (endpoint, failures, cooldown, opened_until, last_error, updated_at)
+                VALUES (:endpoint, :failures, :cooldown, :opened_until, :last_error, :updated_at)
+                """,
+                state,
+            )
+            conn.commit()
+    except sqlite3.OperationalError as exc:
+        logger.debug("Circuit breaker state not saved: %s", exc)
+
+
+def _endpoint(key: str) -> dict:
+    return _endpoints.setdefault(key, {
+        "endpoint": key,
+        "failures": 0,
+        "cooldown": 0,
+        "opened_until": 0.0,
+        "last_error": None,
+        "updated_at": 0.0,
+    })
+
+
+# ── Circuit state ─────────────────────────────────────────────────────────────
+
+def _refused(key: str, now: float) -> bool:
+    """Open, or half-open with its probe still out. Caller holds _lock."""
+    state = _endpoints.get(key)
+    if not state or not state["opened_until"]:
+        return False
+    return now < state["opened_until"] or now - _probes.get(key, 0.0) < PROBE_TIMEOUT
+
+
+def allow(key: str) -> bool:
+    """
+    False while the endpoint's circuit is open. After the cooldown, True for
+    one probe request only; other callers keep getting False until that
+    probe's result is recorded.
+    """
+    with _lock:
+        _load()
+        now = time.time()
+        if _refused(key, now):
+            return False
+        if _endpoints.get(key, {}).get("opened_until"):
+            _probes[key] = now
+        return True
+
+
+def is_open(key: str) -> bool:
+    """Whether allow() would refuse `key` right now, without taking its probe."""
+    with _lock:
+        _load()
+        return _refused(key, time.time())
+
+
+def open_until(key: str) -> float:
+    """Unix time the endpoint's circuit stays open until (0 if closed)."""
+    with _lock:
+        _load()
+        state = _endpoints.get(key)
+        return state["opened_until"] if state else 0.0
+
+
+def record_success(key: str, host: str, latency: float):
+    with _lock:
+        _load()
+        _adapt_delay(host, latency, rate_limited=False)
+        _probes.pop(key, None)
+        state = _endpoints.get(key)
+        if state and (state["failures"] or state["opened_until"]):
+            if state["opened_until"]:
+                logger.info("Circuit closed for %s - probe succeeded", key)
+            state.update(failures=0, cooldown=0, opened_until=0.0, last_error=None,
+                         updated_at=time.time())
+            _save_endpoint(state)
+
+
+def record_failure(key: str, error: str):
+    with _lock:
+        _load()
+        _probes.pop(key, None)
+        state = _endpoint(key)
+        state["failures"] += 1
+        state["last_error"] = error[:500]
+        state["updated_at"] = time.time()
+        if state["failures"] >= FAILURE_THRESHOLD:
+            was_open = bool(state["opened_until"])
+            state["cooldown"] = min(
+                state["cooldown"] * 2 if was_open and state["cooldown"] else BASE_COOLDOWN,
+                MAX_COOLDOWN,
+            )
+            state["opened_until"] = time.time() + state["cooldown"]
+            logger.warning(
+                "Circuit open for %s after %d failures - skipping for %.1fh (%s)",
+                key, state["failures"], state["cooldown"] / 3600, error,
+            )
+        _save_endpoint(state)
+
+
+def record_rate_limited(key: str, host: str, retry_after: float | None):
+    """A 429: slow the host down and hold the endpoint off for Retry-After."""
+    with _lock:
+        _load()
+        _adapt_delay(host, None, rate_limited=True)
+        _probes.pop(key, None)
+        state = _endpoint(key)
+        wait = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        state["opened_until"] = max(state["opened_until"], time.time() + wait)
+        state["last_error"] = "429 Too Many Requests"
+        state["updated_at"] = time.time()
+        _save_endpoint(state)
+        logger.warning("Rate limited by %s - holding off %.0fs", key, wait)
+
+
+# ── Adaptive host delay ───────────────────────────────────────────────────────
+
+def _adapt_delay(host: str, latency: float | None, rate_limited: bool):
+    h = _hosts.setdefault(host, {"delay": 0.0, "latency_ewma": 0.0})
+    if rate_limited:
+        h["delay"] = min(max(h["delay"] * 2, 1.0), MAX_HOST_DELAY)
+        return
+    if h["latency_ewma"]:
+        h["latency_ewma"] += LATENCY_EWMA_WEIGHT * (latency - h["latency_ewma"])
+    else:
+        h["latency_ewma"] = latency
+    h["delay"] *= DELAY_DECAY
+    if h["latency_ewma"] > SLOW_LATENCY:
+        h["delay"] = max(h["delay"], min(h["latency_ewma"] / 2, MAX_HOST_DELAY))
+    if h["delay"] < 0.01:
+        h["delay"] = 0.0
+
+
+def host_delay(host: str) -> float:
+    """Current adaptive politeness delay for `host`, in seconds."""
+    with _lock:
+        _load()
+        h = _hosts.get(host)
+        return h["delay"] if h else 0.0
+
+
+def flush():
+    """Persist host delays. Call once at the end of a run."""
+    with _lock:
+        if _endpoints is None:
+            return
+        try:
+            with db.get_connection() as conn:
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO host_backoff (host, delay, latency_ewma, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    [(host, h["delay"], h["latency_ewma"], time.time()) for host, h in _hosts.items()],
+                )
+                conn.commit()
+        except sqlite3.OperationalError as exc:
+            logger.debug("Host delays not saved: %s", exc)
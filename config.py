@@ -10,15 +10,89 @@ import os
 # ── Slack ─────────────────────────────────────────────────────────────────────
 SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL", "")
 
+# Compact digest layout: several jobs per Slack section instead of one each
+SLACK_DIGEST = os.environ.get("SLACK_DIGEST", "").lower() in ("1", "true", "yes")
+
 # ── JSearch API (RapidAPI) ────────────────────────────────────────────────────
 JSEARCH_API_KEY = os.environ.get("JSEARCH_API_KEY", "")
 
+# ── Politeness ────────────────────────────────────────────────────────────────
+# Requests per second and burst size allowed per host, matched by host suffix.
+# Each Workday tenant / iCIMS client is its own host, so they don't share a budget.
+RATE_LIMITS = {
+    "myworkdayjobs.com":       (3.0, 2),
+    "api.greenhouse.io":       (3.0, 2),
+    "api.smartrecruiters.com": (3.0, 2),
+    "icims.com":               (3.0, 2),
+    "api.lever.co":            (3.0, 2),
+    "jsearch.p.rapidapi.com":  (2.0, 1),
+    "teamworkonline.com":      (2.0, 1),
+}
+# Everything else (e.g. job pages checked by check_expired.py)
+DEFAULT_RATE_LIMIT = (10.0, 5)
+
+# ── TeamWork Online ───────────────────────────────────────────────────────────
+# Listing pages are fetched a few at a time; the crawl stops early at the
+# first page whose jobs are all already in jobs_seen.db.
+TEAMWORK_MAX_PAGES = int(os.environ.get("TEAMWORK_MAX_PAGES", "30"))
+TEAMWORK_CONCURRENCY = 3
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+# Worker processes that parse TeamWork Online / iCIMS listing HTML while the
+# fetch threads keep downloading. 0 parses in-process.
+PARSE_WORKERS = int(os.environ.get(
+    "PARSE_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1)))
+))
+
+# ── Brand ATS boards ──────────────────────────────────────────────────────────
+# The brand boards (Workday, Greenhouse, SmartRecruiters, iCIMS, Lever) add
+# about 30 boards of requests to each run, and their first run finds every
+# open posting as new. Off unless FETCH_BRAND_ATS is set.
+FETCH_BRAND_ATS = os.environ.get("FETCH_BRAND_ATS", "").lower() in ("1", "true", "yes")
+
+# "delta" stops paging a Workday / SmartRecruiters / Greenhouse board once it
+# reaches postings older than the board's high-water mark in jobs_seen.db.
+# "full" reads every board end to end (use after changing filters).
+FETCH_MODE = os.environ.get("FETCH_MODE", "delta").lower()
+
+# Each Workday tenant's job-family / time-type facet values are looked up
+# once and cached in jobs_seen.db for this long; searches then ask only for
+# the non-retail, non-hourly values.
+WORKDAY_FACET_TTL_DAYS = 7
+
+# ── Expiry checks ─────────────────────────────────────────────────────────────
+# check_expired.py probes at most this many job URLs per run (0 = all of
+# them), choosing the jobs most likely to have closed since their last check.
+EXPIRY_BUDGET = int(os.environ.get("EXPIRY_BUDGET", "300"))
+
+# ── Task queue ────────────────────────────────────────────────────────────────
+# With main.py --queue / --worker, a worker holds each task it claims for
+# TASK_LEASE_SECONDS, renewing it while it works. A task whose lease runs
+# out is taken over by another worker; after TASK_MAX_ATTEMPTS claims it is
+# given up. A run whose --queue process hasn't been heard from for as long
+# is abandoned. check_expired.py --queue checks EXPIRY_BATCH jobs per task.
+TASK_LEASE_SECONDS = int(os.environ.get("TASK_LEASE_SECONDS", "120"))
+TASK_MAX_ATTEMPTS = 3
+EXPIRY_BATCH = 25
+# Finished tasks (and their results) are kept this long
+TASK_KEEP_DAYS = 7
+
+# ── jobs_seen.db retention ────────────────────────────────────────────────────
+# Seen jobs not listed by any source for COMPACT_AFTER_DAYS are reduced to a
+# 64-bit ID hash; after RETENTION_DAYS unlisted they are forgotten entirely.
+COMPACT_AFTER_DAYS = int(os.environ.get("COMPACT_AFTER_DAYS", "90"))
+RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", "365"))
+VACUUM_EVERY_DAYS = 7
+
 # ── Job filtering ─────────────────────────────────────────────────────────────
-# Only notify for jobs posted within this many days
-MAX_AGE_DAYS = 30
+# Only fetch jobs posted within this many days (0 = no limit). Undated
+# postings (iCIMS, TeamWork Online) are always kept.
+MAX_AGE_DAYS = int(os.environ.get("MAX_AGE_DAYS", "30"))
 
 # Optional extra keyword filter (set via JOB_KEYWORDS environment variable)
 # Leave empty to get all entry-level jobs. Example: "marketing,design,finance"
+# A job's title must contain one of them. See filters.py for how each
+# fetcher pushes this down to its source.
 KEYWORDS = os.environ.get("JOB_KEYWORDS", "").split(",") if os.environ.get("JOB_KEYWORDS") else []
 
 # ── Entry-Level Title Keywords ────────────────────────────────────────────────
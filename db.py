@@ -1,17 +1,73 @@
 """
 db.py — SQLite deduplication store.
-Tracks which job IDs have already been seen so we never notify twice.
+Tracks which job IDs have already been seen so we never notify twice, and
+holds the Slack outbox so a failed notification is retried on the next drain
+instead of being lost. Also stores per-endpoint health for circuit_breaker.py
+and per-board high-water marks for delta fetching in brand_scrapers.py.
+
+Seen-checks go through a Bloom filter first (bloom.py, saved as
+jobs_seen.bloom), so jobs that are definitely new never touch SQLite.
+Jobs that have not been listed for a while are compacted by retention.py
+into seen_hashes, which keeps only a 64-bit hash of the ID.
+
+seen_jobs is indexed by an FTS5 table (jobs_fts) over title, company and
+location, kept in sync by triggers; search_jobs() runs ranked queries on it.
+
+The DB is opened in WAL mode, so readers never block the writer and several
+local processes (see tasks.py) can share it. Writers wait up to
+BUSY_TIMEOUT seconds for each other instead of failing.
 """
 
+import hashlib
+import json
+import logging
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from bloom import BloomFilter, sized_for
+from job import Job
+
+logger = logging.getLogger(__name__)
+
 DB_PATH = Path(__file__).parent / "jobs_seen.db"
+BUSY_TIMEOUT = 30
+
+_wal_dbs: set[Path] = set()
+
+# Board state held back from the DB while a shard runs (defer_board_writes)
+_deferred: dict | None = None
+
+_bloom_lock = threading.Lock()
+_bloom: BloomFilter | None = None
+_bloom_db: Path | None = None
+
+
+def stable_hash(value: str) -> str:
+    """
+    Short hex digest of `value` that is the same in every process.
+    Use this for job IDs, never the built-in hash(), which is salted per run.
+    """
+    return hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+def id_hash(job_id: str) -> int:
+    """Signed 64-bit hash of a job ID, the key of seen_hashes and the Bloom filter."""
+    digest = hashlib.blake2b(job_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
 
 
 def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
     conn.row_factory = sqlite3.Row
+    conn.create_function("id_hash", 1, id_hash, deterministic=True)
+    if DB_PATH not in _wal_dbs:
+        # Stored in the file, so once per DB is enough
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_dbs.add(DB_PATH)
     return conn
 
 
@@ -26,30 +82,903 @@ def init_db():
                 company     TEXT,
                 location    TEXT,
                 source      TEXT,
-                seen_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                seen_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_listed_at TIMESTAMP,
+                url         TEXT,
+                posted_on   TEXT,
+                expired_at  TIMESTAMP,
+                last_checked_at TIMESTAMP,
+                check_status    TEXT
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(seen_jobs)")}
+        for column in ("last_listed_at", "url", "posted_on", "expired_at",
+                       "last_checked_at", "check_status"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE seen_jobs ADD COLUMN {column}")
+        _init_search(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_hashes (
+                hash           INTEGER PRIMARY KEY,
+                last_listed_at TIMESTAMP NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS slack_outbox (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id          TEXT UNIQUE,
+                payload         TEXT NOT NULL,
+                attempts        INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error      TEXT,
+                created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS endpoint_health (
+                endpoint     TEXT PRIMARY KEY,
+                failures     INTEGER DEFAULT 0,
+                cooldown     REAL DEFAULT 0,
+                opened_until REAL DEFAULT 0,
+                last_error   TEXT,
+                updated_at   REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS host_backoff (
+                host         TEXT PRIMARY KEY,
+                delay        REAL DEFAULT 0,
+                latency_ewma REAL DEFAULT 0,
+                updated_at   REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS board_watermarks (
+                board      TEXT PRIMARY KEY,
+                watermark  TEXT NOT NULL,
+                updated_at REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS workday_facets (
+                board      TEXT PRIMARY KEY,
+                applied    TEXT NOT NULL,
+                updated_at REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_signatures (
+                domain     TEXT NOT NULL,
+                kind       TEXT NOT NULL,
+                pattern    TEXT NOT NULL,
+                dead_hits  INTEGER DEFAULT 0,
+                live_hits  INTEGER DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (domain, kind, pattern)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS merged_partials (
+                partial_id TEXT PRIMARY KEY,
+                new_jobs   INTEGER,
+                merged_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id       TEXT PRIMARY KEY,
+                run_id        TEXT NOT NULL,
+                kind          TEXT NOT NULL,
+                payload       TEXT NOT NULL,
+                status        TEXT NOT NULL DEFAULT 'pending',
+                attempts      INTEGER DEFAULT 0,
+                lease_owner   TEXT,
+                lease_expires REAL DEFAULT 0,
+                result        TEXT,
+                last_error    TEXT,
+                updated_at    REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_open ON tasks (status, lease_expires)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS task_runs (
+                run_id       TEXT PRIMARY KEY,
+                kind         TEXT NOT NULL,
+                owner        TEXT,
+                heartbeat_at REAL,
+                finished_at  REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS db_meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
             )
             """
         )
         conn.commit()
 
 
+# ── Seen-ID filter ────────────────────────────────────────────────────────────
+
+def _bloom_path() -> Path:
+    return DB_PATH.with_suffix(".bloom")
+
+
+def _seen_filter() -> BloomFilter:
+    """The Bloom filter for the current DB, loaded or rebuilt on first use."""
+    global _bloom, _bloom_db
+    with _bloom_lock:
+        if _bloom is not None and _bloom_db == DB_PATH:
+            return _bloom
+        with get_connection() as conn:
+            rows = _count_seen(conn)
+            loaded = BloomFilter.load(_bloom_path())
+            if loaded and loaded[1] == rows and rows <= loaded[0].capacity:
+                bf = loaded[0]
+            else:
+                start = time.perf_counter()
+                bf = sized_for(rows)
+                for (h,) in conn.execute(
+                    "SELECT id_hash(id) FROM seen_jobs UNION ALL SELECT hash FROM seen_hashes"
+                ):
+                    bf.add(h)
+                logger.info("Rebuilt seen-ID filter from %d rows in %.2fs",
+                            rows, time.perf_counter() - start)
+        _bloom, _bloom_db = bf, DB_PATH
+        return bf
+
+
+def _count_seen(conn: sqlite3.Connection) -> int:
+    return conn.execute(
+        "SELECT (SELECT COUNT(*) FROM seen_jobs) + (SELECT COUNT(*) FROM seen_hashes)"
+    ).fetchone()[0]
+
+
+def save_seen_filter():
+    """Write the Bloom filter next to the DB. Call once at the end of a run."""
+    with _bloom_lock:
+        if _bloom is None or _bloom_db != DB_PATH:
+            return
+        with get_connection() as conn:
+            rows = _count_seen(conn)
+        _bloom.save(_bloom_path(), rows)
+
+
+def reset_seen_filter():
+    """Drop the in-memory filter (after rows were deleted) so it gets rebuilt."""
+    global _bloom
+    with _bloom_lock:
+        _bloom = None
+
+
+def _init_search(conn: sqlite3.Connection):
+    """Create the FTS5 index over seen_jobs and the triggers that maintain it."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            title, company, location,
+            content = 'seen_jobs', content_rowid = 'rowid',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    conn.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS seen_jobs_fts_insert AFTER INSERT ON seen_jobs BEGIN
+            INSERT INTO jobs_fts (rowid, title, company, location)
+            VALUES (new.rowid, new.title, new.company, new.location);
+        END;
+        CREATE TRIGGER IF NOT EXISTS seen_jobs_fts_delete AFTER DELETE ON seen_jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location)
+            VALUES ('delete', old.rowid, old.title, old.company, old.location);
+        END;
+        CREATE TRIGGER IF NOT EXISTS seen_jobs_fts_update
+        AFTER UPDATE OF title, company, location ON seen_jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location)
+            VALUES ('delete', old.rowid, old.title, old.company, old.location);
+            INSERT INTO jobs_fts (rowid, title, company, location)
+            VALUES (new.rowid, new.title, new.company, new.location);
+        END;
+        """
+    )
+    if not exists:
+        # Index the rows of a DB created before the search table existed
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
 def is_new_job(job_id: str) -> bool:
     """Return True if this job_id has never been seen before."""
+    h = id_hash(job_id)
+    if h not in _seen_filter():
+        return True
     with get_connection() as conn:
         row = conn.execute(
-            "SELECT 1 FROM seen_jobs WHERE id = ?", (job_id,)
+            """
+            SELECT 1 FROM seen_jobs WHERE id = ?
+            UNION ALL
+            SELECT 1 FROM seen_hashes WHERE hash = ?
+            """,
+            (job_id, h),
         ).fetchone()
         return row is None
 
 
-def mark_job_seen(job: dict):
-    """Insert a job into the seen table so it won't be notified again."""
+def seen_ids(job_ids: list[str]) -> set[str]:
+    """Return the subset of `job_ids` that are already in the seen tables."""
+    bf = _seen_filter()
+    hashes = {}
+    for job_id in job_ids:
+        h = id_hash(job_id)
+        if h in bf:
+            hashes[h] = job_id
+    candidates = list(hashes.values())
+    found = set()
+    with get_connection() as conn:
+        for i in range(0, len(candidates), 500):
+            chunk = candidates[i: i + 500]
+            rows = conn.execute(
+                "SELECT id FROM seen_jobs WHERE id IN (%s)" % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            found.update(row[0] for row in rows)
+            chunk = [id_hash(job_id) for job_id in chunk]
+            rows = conn.execute(
+                "SELECT hash FROM seen_hashes WHERE hash IN (%s)" % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            found.update(hashes[row[0]] for row in rows)
+    return found
+
+
+def mark_job_seen(job: Job, notify: bool = False) -> bool:
+    """
+    Insert a job into the seen table so it won't be notified again.
+    With notify=True the job is queued in the Slack outbox in the same
+    transaction, so a job can never be marked seen without being queued.
+
+    Returns False, and queues nothing, if the job was already there: another
+    process sharing the DB got to it first.
+    """
+    bf = _seen_filter()
+    with get_connection() as conn:
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO seen_jobs
+                (id, title, company, location, source, url, posted_on)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job.id, job.title, job.company, job.location, job.source,
+             job.url, job.posted_on),
+        )
+        if notify and cur.rowcount:
+            _enqueue(conn, [job])
+        conn.commit()
+    if cur.rowcount:
+        with _bloom_lock:
+            bf.add(id_hash(job.id))
+    return bool(cur.rowcount)
+
+
+def touch_listed(job_ids):
+    """Record that these jobs were still listed by a source this run."""
+    now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    with get_connection() as conn:
+        conn.executemany(
+            "UPDATE seen_jobs SET last_listed_at = ? WHERE id = ?",
+            [(now, job_id) for job_id in job_ids],
+        )
+        conn.executemany(
+            "UPDATE seen_hashes SET last_listed_at = ? WHERE hash = ?",
+            [(now, id_hash(job_id)) for job_id in job_ids],
+        )
+        conn.commit()
+
+
+def mark_expired(job_ids):
+    """Record that check_expired.py found these postings gone."""
+    with get_connection() as conn:
+        conn.executemany(
+            "UPDATE seen_jobs SET expired_at = CURRENT_TIMESTAMP WHERE id = ? AND expired_at IS NULL",
+            [(job_id,) for job_id in job_ids],
+        )
+        conn.commit()
+
+
+# ── Expiry checks ─────────────────────────────────────────────────────────────
+
+def check_states(job_ids: list[str]) -> dict[str, tuple]:
+    """{id: (last_checked_at, seen_at)} for the jobs in `job_ids` that are in seen_jobs."""
+    states = {}
+    with get_connection() as conn:
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i: i + 500]
+            rows = conn.execute(
+                "SELECT id, last_checked_at, seen_at FROM seen_jobs WHERE id IN (%s)"
+                % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            states.update((row[0], (row[1], row[2])) for row in rows)
+    return states
+
+
+def record_checks(results):
+    """
+    Store expiry check outcomes, (job_id, status) with status "active",
+    "expired" or "error". An error leaves last_checked_at alone, so the
+    job stays near the front of the next run's schedule.
+    """
+    now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            UPDATE seen_jobs SET check_status = ?,
+                last_checked_at = CASE WHEN ? = 'error' THEN last_checked_at ELSE ? END
+            WHERE id = ?
+            """,
+            [(status, status, now, job_id) for job_id, status in results],
+        )
+        conn.commit()
+
+
+def expiry_rates(prior_checks: int = 10, prior_rate: float = 0.1) -> dict[str, float]:
+    """
+    Share of checked jobs per source that turned out expired, smoothed
+    towards `prior_rate` so a source with few checks isn't scored 0 or 1.
+    """
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT source, COUNT(*), SUM(check_status = 'expired')
+            FROM seen_jobs WHERE last_checked_at IS NOT NULL GROUP BY source
+            """
+        ).fetchall()
+    return {
+        source: (expired + prior_rate * prior_checks) / (checked + prior_checks)
+        for source, checked, expired in rows
+    }
+
+
+def dead_signatures(domain: str) -> dict[tuple[str, str], list[int]]:
+    """{(kind, pattern): [dead_hits, live_hits]} learned so far for `domain`."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT kind, pattern, dead_hits, live_hits FROM dead_signatures WHERE domain = ?",
+            (domain,),
+        )
+        return {(row[0], row[1]): [row[2], row[3]] for row in rows}
+
+
+def record_signature(domain: str, kind: str, pattern: str, dead: bool):
+    """Count one dead (or live) page on `domain` showing `pattern`."""
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO dead_signatures (domain, kind, pattern, dead_hits, live_hits, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(domain, kind, pattern) DO UPDATE SET
+                dead_hits  = dead_hits + excluded.dead_hits,
+                live_hits  = live_hits + excluded.live_hits,
+                updated_at = excluded.updated_at
+            """,
+            (domain, kind, pattern, int(dead), int(not dead), time.time()),
+        )
+        conn.commit()
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    "mktg intern nike" -> "mktg"* AND "intern"* AND "nike"*
+    """
+    return " AND ".join(f'"{token}"*' for token in _TOKEN_RE.findall(text))
+
+
+def search_jobs(text: str, limit: int = 50, active_only: bool = False,
+                raw: bool = False) -> list[dict]:
+    """
+    Ranked full-text search over stored jobs (title, company, location).
+    Title matches weigh most, then company, then location. With raw=True,
+    `text` is passed through as FTS5 query syntax (column filters, OR, NEAR).
+    """
+    query = text if raw else fts_query(text)
+    if not query:
+        return []
+    sql = """
+        SELECT s.id, s.title, s.company, s.location, s.source, s.url,
+               s.posted_on, s.seen_at, s.expired_at,
+               bm25(jobs_fts, 10.0, 5.0, 1.0) AS rank
+        FROM jobs_fts
+        JOIN seen_jobs s ON s.rowid = jobs_fts.rowid
+        WHERE jobs_fts MATCH ?
+    """
+    if active_only:
+        sql += " AND s.expired_at IS NULL"
+    sql += " ORDER BY rank LIMIT ?"
+    with get_connection() as conn:
+        return [dict(row) for row in conn.execute(sql, (query, limit))]
+
+
+def get_meta(key: str, default: str = "") -> str:
+    if _deferred is not None and key in _deferred["meta"]:
+        return _deferred["meta"][key]
+    with get_connection() as conn:
+        row = conn.execute("SELECT value FROM db_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+
+def set_meta(key: str, value: str):
+    if _deferred is not None:
+        _deferred["meta"][key] = value
+        return
+    with get_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)", (key, value))
+        conn.commit()
+
+
+# ── Board watermarks ──────────────────────────────────────────────────────────
+
+def get_watermark(board: str) -> str:
+    """Newest posting date (YYYY-MM-DD) seen on `board` so far, or ""."""
+    if _deferred is not None:
+        if board in _deferred["watermarks"]:
+            return _deferred["watermarks"][board]
+        if board in _deferred["cleared_watermarks"]:
+            return ""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT watermark FROM board_watermarks WHERE board = ?", (board,)
+        ).fetchone()
+        return row[0] if row else ""
+
+
+def set_watermark(board: str, watermark: str):
+    """Advance `board`'s high-water mark. Never moves it backwards."""
+    if _deferred is not None:
+        _deferred["watermarks"][board] = max(get_watermark(board), watermark)
+        return
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO board_watermarks (board, watermark, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(board) DO UPDATE SET
+                watermark  = MAX(watermark, excluded.watermark),
+                updated_at = excluded.updated_at
+            """,
+            (board, watermark, time.time()),
+        )
+        conn.commit()
+
+
+def clear_watermark(board: str):
+    """Forget `board`'s high-water mark, so the next delta fetch reads it in full."""
+    if _deferred is not None:
+        _deferred["watermarks"].pop(board, None)
+        if board not in _deferred["cleared_watermarks"]:
+            _deferred["cleared_watermarks"].append(board)
+        return
+    with get_connection() as conn:
+        conn.execute("DELETE FROM board_watermarks WHERE board = ?", (board,))
+        conn.commit()
+
+
+# ── Shard partials ────────────────────────────────────────────────────────────
+
+@contextmanager
+def defer_board_writes():
+    """
+    Hold board state (watermarks, Workday facets, db_meta) in memory instead
+    of writing it, for a shard whose results may never be merged. Reads see
+    the held values. Yields the held state, which apply_board_snapshot()
+    writes later.
+    """
+    global _deferred
+    _deferred = {"watermarks": {}, "cleared_watermarks": [], "workday_facets": {}, "meta": {}}
+    try:
+        yield _deferred
+    finally:
+        _deferred = None
+
+
+def apply_board_snapshot(snapshot: dict):
+    """Write board state held by defer_board_writes(). Safe to apply twice."""
+    for board in snapshot.get("cleared_watermarks", []):
+        clear_watermark(board)
+    for board, watermark in snapshot.get("watermarks", {}).items():
+        set_watermark(board, watermark)
+    for board, applied in snapshot.get("workday_facets", {}).items():
+        if applied is None:
+            clear_workday_facets(board)
+        else:
+            set_workday_facets(board, applied)
+    for key, value in snapshot.get("meta", {}).items():
+        set_meta(key, value)
+
+
+def is_partial_merged(partial_id: str) -> bool:
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT 1 FROM merged_partials WHERE partial_id = ?", (partial_id,)
+        ).fetchone() is not None
+
+
+def mark_partial_merged(partial_id: str, new_jobs: int):
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO merged_partials (partial_id, new_jobs) VALUES (?, ?)",
+            (partial_id, new_jobs),
+        )
+        conn.commit()
+
+
+# ── Task queue ────────────────────────────────────────────────────────────────
+# A run (task_runs) is live while the process that queued it keeps
+# heartbeat_at fresh; only live runs' tasks are handed out.
+
+def start_run(run_id: str, kind: str, owner: str):
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO task_runs (run_id, kind, owner, heartbeat_at) VALUES (?, ?, ?, ?)",
+            (run_id, kind, owner, time.time()),
+        )
+        conn.commit()
+
+
+def beat_run(run_id: str):
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE task_runs SET heartbeat_at = ? WHERE run_id = ?", (time.time(), run_id)
+        )
+        conn.commit()
+
+
+def finish_run(run_id: str):
+    """Mark a run's results collected."""
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE task_runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id)
+        )
+        conn.commit()
+
+
+def add_tasks(run_id: str, tasks: list[tuple[str, str, dict]]):
+    """Queue (key, kind, payload) tasks for `run_id`. Re-adding a task is a no-op."""
+    now = time.time()
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO tasks (task_id, run_id, kind, payload, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(f"{run_id}:{key}", run_id, kind, json.dumps(payload), now)
+             for key, kind, payload in tasks],
+        )
+        conn.commit()
+
+
+def claim_task(owner: str, lease: float, max_attempts: int, run_timeout: float,
+               run_id: str | None = None) -> sqlite3.Row | None:
+    """
+    Lease the oldest open task (of `run_id`, if given) to `owner` for
+    `lease` seconds. Open means pending, or leased with the lease run out.
+
+    First fails what can no longer finish: tasks whose lease ran out after
+    `max_attempts` claims, and open tasks of runs whose heartbeat is older
+    than `run_timeout` (nobody would collect their results). A task of such
+    a run that a worker still holds is left to finish; abandoned_runs()
+    waits for it.
+    """
+    now = time.time()
+    run_filter = "AND run_id = ?" if run_id else ""
+    run_args = (run_id,) if run_id else ()
+    with get_connection() as conn:
+        conn.execute(
+            """
+            UPDATE tasks SET status = 'failed', lease_owner = NULL,
+                             last_error = 'lease expired', updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """,
+            (now, now, max_attempts),
+        )
+        conn.execute(
+            """
+            UPDATE tasks SET status = 'failed', lease_owner = NULL,
+                             last_error = 'run abandoned', updated_at = ?
+            WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+              AND run_id NOT IN (
+                SELECT run_id FROM task_runs
+                WHERE finished_at IS NULL AND heartbeat_at >= ?
+            )
+            """,
+            (now, now, now - run_timeout),
+        )
+        row = conn.execute(
+            f"""
+            UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                             attempts = attempts + 1, updated_at = ?
+            WHERE task_id = (
+                SELECT task_id FROM tasks
+                WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                      {run_filter}
+                ORDER BY rowid LIMIT 1
+            )
+            RETURNING task_id, run_id, kind, payload, attempts
+            """,
+            (owner, now + lease, now, now, *run_args),
+        ).fetchone()
+        conn.commit()
+        return row
+
+
+def renew_lease(task_id: str, owner: str, lease: float) -> bool:
+    """Extend `owner`'s lease by `lease` seconds from now. False if it was lost."""
+    now = time.time()
+    with get_connection() as conn:
+        cur = conn.execute(
+            """
+            UPDATE tasks SET lease_expires = ?, updated_at = ?
+            WHERE task_id = ? AND lease_owner = ? AND status = 'leased'
+            """,
+            (now + lease, now, task_id, owner),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+
+
+def _merged_result(stored: str | None, result: dict) -> str:
+    """`result`, with the lists of an earlier stored result added in."""
+    if stored:
+        merged = json.loads(stored)
+        for key, value in result.items():
+            merged[key] = merged.get(key, []) + value
+        result = merged
+    return json.dumps(result)
+
+
+def complete_task(task_id: str, owner: str, result: dict) -> bool:
+    """
+    Mark a task done with `result`, a dict of lists. Lists stored by an
+    earlier failed attempt, or by another worker that took the task over
+    and finished first, are kept too, so nothing any attempt found is lost.
+    True if `owner` still held the lease.
+    """
     with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT status, lease_owner, result FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            conn.rollback()
+            return False
         conn.execute(
             """
-            INSERT OR IGNORE INTO seen_jobs (id, title, company, location, source)
-            VALUES (:id, :title, :company, :location, :source)
+            UPDATE tasks SET status = 'done', lease_owner = NULL, result = ?, updated_at = ?
+            WHERE task_id = ?
+            """,
+            (_merged_result(row["result"], result), time.time(), task_id),
+        )
+        conn.commit()
+        return row["status"] == "leased" and row["lease_owner"] == owner
+
+
+def fail_task(task_id: str, owner: str, error: str, max_attempts: int, result: dict):
+    """
+    Give a failed task back (pending again, or failed after `max_attempts`),
+    keeping `result`: whatever the attempt had already done.
+    """
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT result FROM tasks WHERE task_id = ? AND lease_owner = ? AND status = 'leased'",
+            (task_id, owner),
+        ).fetchone()
+        if row is None:
+            # Taken over; keep what this attempt found all the same
+            conn.execute(
+                "UPDATE tasks SET result = ? WHERE task_id = ?",
+                (_merged_result(_stored_result(conn, task_id), result), task_id),
+            )
+        else:
+            conn.execute(
+                """
+                UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                 lease_owner = NULL, lease_expires = 0,
+                                 result = ?, last_error = ?, updated_at = ?
+                WHERE task_id = ?
+                """,
+                (max_attempts, _merged_result(row["result"], result), error[:500],
+                 time.time(), task_id),
+            )
+        conn.commit()
+
+
+def _stored_result(conn: sqlite3.Connection, task_id: str) -> str | None:
+    row = conn.execute("SELECT result FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+    return row[0] if row else None
+
+
+def task_counts(run_id: str | None = None) -> dict[str, int]:
+    """{status: count} over the tasks of `run_id` (or all tasks)."""
+    sql = "SELECT status, COUNT(*) FROM tasks"
+    args = ()
+    if run_id:
+        sql += " WHERE run_id = ?"
+        args = (run_id,)
+    with get_connection() as conn:
+        return dict(conn.execute(sql + " GROUP BY status", args).fetchall())
+
+
+def task_results(run_id: str) -> list[dict]:
+    """
+    Results of the tasks of `run_id`, in queue order. Failed tasks are
+    included: they hold what their attempts did before failing.
+    """
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT result FROM tasks
+            WHERE run_id = ? AND status IN ('done', 'failed') AND result IS NOT NULL
+            ORDER BY rowid
+            """,
+            (run_id,),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+
+def abandoned_runs(kind: str, run_timeout: float) -> list[str]:
+    """
+    Runs of `kind` whose process stopped heartbeating before collecting
+    results, and whose tasks have all stopped running.
+    """
+    now = time.time()
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT run_id FROM task_runs r
+            WHERE kind = ? AND finished_at IS NULL AND heartbeat_at < ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM tasks t
+                  WHERE t.run_id = r.run_id AND t.status = 'leased' AND t.lease_expires >= ?
+              )
+            ORDER BY heartbeat_at
+            """,
+            (kind, now - run_timeout, now),
+        )
+        return [row[0] for row in rows]
+
+
+# ── Workday facets ────────────────────────────────────────────────────────────
+
+def get_workday_facets(board: str, max_age_days: float) -> dict | None:
+    """Cached appliedFacets for `board`, or None if missing or older than `max_age_days`."""
+    if _deferred is not None and board in _deferred["workday_facets"]:
+        return _deferred["workday_facets"][board]
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT applied FROM workday_facets WHERE board = ? AND updated_at >= ?",
+            (board, time.time() - max_age_days * 86400),
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def set_workday_facets(board: str, applied: dict) -> bool:
+    """Store `board`'s appliedFacets. True if they differ from the ones stored before."""
+    if _deferred is not None:
+        held = _deferred["workday_facets"]
+        previous = held[board] if board in held else get_workday_facets(board, float("inf"))
+        held[board] = applied
+        return previous is not None and previous != applied
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT applied FROM workday_facets WHERE board = ?", (board,)
+        ).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO workday_facets (board, applied, updated_at) VALUES (?, ?, ?)",
+            (board, json.dumps(applied), time.time()),
+        )
+        conn.commit()
+    return row is not None and json.loads(row[0]) != applied
+
+
+def clear_workday_facets(board: str):
+    if _deferred is not None:
+        _deferred["workday_facets"][board] = None
+        return
+    with get_connection() as conn:
+        conn.execute("DELETE FROM workday_facets WHERE board = ?", (board,))
+        conn.commit()
+
+
+# ── Slack outbox ──────────────────────────────────────────────────────────────
+
+def _enqueue(conn: sqlite3.Connection, jobs: list[Job]):
+    conn.executemany(
+        "INSERT OR IGNORE INTO slack_outbox (job_id, payload) VALUES (?, ?)",
+        [(job.id, json.dumps(job.to_dict())) for job in jobs],
+    )
+
+
+def enqueue_notifications(jobs: list[Job]):
+    """Queue jobs for Slack delivery. Jobs already queued are ignored."""
+    with get_connection() as conn:
+        _enqueue(conn, jobs)
+        conn.commit()
+
+
+def pending_notifications(limit: int, max_attempts: int) -> list[sqlite3.Row]:
+    """Return queued notifications that are due now, oldest first."""
+    with get_connection() as conn:
+        return conn.execute(
+            """
+            SELECT id, payload, attempts FROM slack_outbox
+            WHERE next_attempt_at <= ? AND attempts < ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (time.time(), max_attempts, limit),
+        ).fetchall()
+
+
+def count_pending_notifications(max_attempts: int) -> int:
+    """Number of queued notifications that still have attempts left."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM slack_outbox WHERE attempts < ?",
+            (max_attempts,),
+        ).fetchone()
+        return row[0]
+
+
+def delete_notifications(outbox_ids: list[int]):
+    """Remove delivered (or given up) notifications from the outbox."""
+    with get_connection() as conn:
+        conn.executemany(
+            "DELETE FROM slack_outbox WHERE id = ?",
+            [(i,) for i in outbox_ids],
+        )
+        conn.commit()
+
+
+def defer_notifications(outbox_ids: list[int], delay: float, error: str):
+    """Record a failed attempt and push the next try `delay` seconds out."""
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            UPDATE slack_outbox
+            SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
             """,
-            job,
+            [(time.time() + delay, error, i) for i in outbox_ids],
         )
         conn.commit()
@@ -0,0 +1,73 @@
+"""
+filters.py — The user's job filter (JOB_KEYWORDS, MAX_AGE_DAYS) as one spec
+every fetcher shares.
+
+Each fetcher pushes what its source supports into the request itself:
+
+- Workday         searchText, one search per keyword
+- SmartRecruiters q, one search per keyword
+- JSearch         keywords appended to the query, date_posted from MAX_AGE_DAYS
+- dated boards    MAX_AGE_DAYS becomes the paging floor, like a watermark
+
+Everything else (Greenhouse, iCIMS, Lever, TeamWork Online, and anything a
+server-side search lets through) is checked with title_matches() /
+too_old() on the raw posting, before a Job is built.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from config import KEYWORDS, MAX_AGE_DAYS
+
+
+class FilterSpec:
+    __slots__ = ("keywords", "max_age_days", "since")
+
+    def __init__(self, keywords=(), max_age_days: int = 0):
+        self.keywords = tuple(dict.fromkeys(
+            k.strip().lower() for k in keywords if k and k.strip()
+        ))
+        self.max_age_days = max_age_days
+        # Oldest posting date (ISO) still wanted, "" for no limit
+        self.since = ""
+        if max_age_days > 0:
+            today = datetime.now(timezone.utc).date()
+            self.since = (today - timedelta(days=max_age_days)).isoformat()
+
+    @classmethod
+    def from_config(cls) -> "FilterSpec":
+        return cls(KEYWORDS, MAX_AGE_DAYS)
+
+    def key(self) -> str:
+        """Stable text form, to tell whether the filter changed between runs."""
+        return f"{','.join(sorted(self.keywords))}|{self.max_age_days}"
+
+    def search_terms(self) -> list[str]:
+        """Server-side search terms: one per keyword, or [""] for everything."""
+        return list(self.keywords) or [""]
+
+    def title_matches(self, title: str) -> bool:
+        if not self.keywords:
+            return True
+        t = title.lower()
+        return any(kw in t for kw in self.keywords)
+
+    def too_old(self, posted: str) -> bool:
+        """True if ISO date `posted` is before the cutoff. Undated postings pass."""
+        return bool(self.since and posted and posted < self.since)
+
+    def jsearch_query(self, query: str) -> str:
+        if not self.keywords:
+            return query
+        terms = [f'"{kw}"' if " " in kw else kw for kw in self.keywords]
+        if len(terms) == 1:
+            return f"{query} {terms[0]}"
+        return f"{query} ({' OR '.join(terms)})"
+
+    def jsearch_date_posted(self) -> str:
+        """The narrowest JSearch date_posted bucket that covers max_age_days."""
+        if self.max_age_days <= 0:
+            return "all"
+        for days, bucket in ((1, "today"), (3, "3days"), (7, "week"), (30, "month")):
+            if self.max_age_days <= days:
+                return bucket
+        return "all"
@@ -9,51 +9,62 @@ Each job row has three possible states:
 Both states are saved in the browser so they persist across page refreshes.
 """
 
-import json
+import argparse
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import jobs_log
+import profiling
+from db import init_db, search_jobs
+from job import Job
+from labels import source_label
 
 JOBS_LOG = Path(__file__).parent / "all_jobs.json"
 OUTPUT = Path(__file__).parent / "dashboard.html"
 
 
-def load_jobs() -> list[dict]:
-    if not JOBS_LOG.exists():
-        return []
-    with open(JOBS_LOG) as f:
-        return json.load(f)
+def load_jobs() -> Iterator[Job]:
+    """Stream the jobs in all_jobs.json, oldest first."""
+    return jobs_log.iter_jobs(JOBS_LOG)
+
+
+def filter_jobs(jobs: Iterable[Job], query: str) -> Iterator[Job]:
+    """The jobs matching a full-text query on the job store (see db.search_jobs)."""
+    init_db()
+    matches = {j["id"] for j in search_jobs(query, limit=-1, active_only=True)}
+    return (job for job in jobs if job.id in matches)
 
 
-def generate(jobs: list[dict]):
-    total = len(jobs)
-    companies = sorted(set(j["company"] for j in jobs))
+def generate(jobs: Iterable[Job], output: Path | None = None):
+    output = output or OUTPUT
+    companies = set()
     last_updated = datetime.utcnow().strftime("%B %d, %Y at %I:%M %p UTC")
 
-    rows = ""
-    for job in reversed(jobs):
-        source_label = "Job Board" if job["source"] == "jsearch_api" else "Career Page" if job["source"] == "workday_scrape" else "TeamWork Online"
-        if job["source"] == "jsearch_api":
-            source_class = "badge-api"
-        elif job["source"] == "teamwork_online":
-            source_class = "badge-teamwork"
-        else:
-            source_class = "badge-workday"
-        posted = (job.get("posted_on") or "")[:10] or "—"
-        job_id = job["id"].replace("'", "\\'").replace('"', '&quot;')
-        rows += f"""
-        <tr data-id="{job['id']}">
-            <td><a href="{job['url']}" target="_blank" rel="noopener">{job['title']}</a></td>
-            <td>{job['company']}</td>
-            <td>{job.get('location') or '—'}</td>
+    # Rows are built oldest first and joined newest first
+    rows = []
+    for job in jobs:
+        companies.add(job.company)
+        label, source_class = source_label(job.source)
+        posted = job.posted_on[:10] or "—"
+        job_id = job.id.replace("'", "\\'").replace('"', '&quot;')
+        rows.append(f"""
+        <tr data-id="{job.id}">
+            <td><a href="{job.url}" target="_blank" rel="noopener">{job.title}</a></td>
+            <td>{job.company}</td>
+            <td>{job.location or '—'}</td>
             <td>{posted}</td>
-            <td><span class="badge {source_class}">{source_label}</span></td>
+            <td><span class="badge {source_class}">{label}</span></td>
             <td class="action-cell">
                 <button class="apply-btn" onclick="markApplied('{job_id}', this)" title="Mark as applied">✓ Applied</button>
                 <button class="dismiss-btn" onclick="markDismissed('{job_id}', this)" title="Not a good fit">✕ Not a Fit</button>
             </td>
-        </tr>"""
+        </tr>""")
 
-    company_options = "".join(f'<option value="{c}">{c}</option>' for c in companies)
+    total = len(rows)
+    rows.reverse()
+    rows = "".join(rows)
+    company_options = "".join(f'<option value="{c}">{c}</option>' for c in sorted(companies))
 
     html = f"""<!DOCTYPE html>
 <html lang="en">
@@ -325,11 +336,36 @@ def generate(jobs: list[dict]):
 </body>
 </html>"""
 
-    with open(OUTPUT, "w") as f:
+    with open(output, "w") as f:
         f.write(html)
-    print(f"Dashboard generated: {OUTPUT} ({total} jobs)")
+    print(f"Dashboard generated: {output} ({total} jobs)")
 
 
 if __name__ == "__main__":
-    jobs = load_jobs()
-    generate(jobs)
+    parser = argparse.ArgumentParser(description="Regenerate dashboard.html from all_jobs.json")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="profile loading and rendering with cProfile + tracemalloc",
+    )
+    parser.add_argument(
+        "--profile-dir", type=Path, default=profiling.ARTIFACTS_DIR,
+        help="where --profile writes its reports (default: artifacts/profile)",
+    )
+    parser.add_argument(
+        "--query",
+        help='only include jobs matching this full-text search (e.g. "marketing intern")',
+    )
+    parser.add_argument(
+        "--output", type=Path,
+        help="where to write the page (default: dashboard.html)",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile_dir)
+    # One phase: the jobs are streamed from all_jobs.json while rendering,
+    # so loading can't be timed apart from it
+    with profiling.phase("dashboard"):
+        jobs = load_jobs()
+        if args.query:
+            jobs = filter_jobs(jobs, args.query)
+        generate(jobs, args.output)
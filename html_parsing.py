@@ -0,0 +1,119 @@
+"""
+html_parsing.py — Fast job-card extraction for the HTML listing pages
+(TeamWork Online and iCIMS).
+
+Instead of building a full BeautifulSoup tree and running lambda class
+matchers over it, each page is parsed with a SoupStrainer that keeps only
+the job-card subtrees. lxml is used as the parser when it is installed,
+with html.parser as the fallback. Each card's fields are then collected in
+a single walk over its descendants.
+
+The helpers return plain tuples so the scrapers stay in charge of building
+job dicts and applying filters.
+"""
+
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+_ICIMS_CARD_RE = re.compile(r"icims_jobstable_listitem", re.I)
+_JOB_RE = re.compile(r"job", re.I)
+
+TEAMWORK_TITLE_TAGS = frozenset(("h2", "h3", "h4", "a"))
+ICIMS_TITLE_TAGS = frozenset(("h2", "h3", "a"))
+
+
+def _class_string(value) -> str:
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return value.lower()
+    return " ".join(value).lower()
+
+
+def _teamwork_card(name, attrs) -> bool:
+    if name == "article":
+        return True
+    classes = _class_string(attrs.get("class"))
+    return (name == "li" and "job" in classes) or "job-post" in classes
+
+
+def _icims_card(name, attrs) -> bool:
+    classes = _class_string(attrs.get("class"))
+    if name == "div":
+        return "icims_jobstable_listitem" in classes
+    return name == "li" and "job" in classes
+
+
+TEAMWORK_STRAINER = SoupStrainer(_teamwork_card)
+ICIMS_STRAINER = SoupStrainer(_icims_card)
+
+
+def _scan_card(card: Tag, title_tags: frozenset, want_company: bool):
+    """
+    One pass over a card's descendants, returning the first title element,
+    the first link with an href, and the first elements whose class mentions
+    "company" / "location" (the same picks the old card.find() calls made).
+    """
+    title_el = link_el = company_el = loc_el = None
+    for el in card.descendants:
+        if not isinstance(el, Tag):
+            continue
+        if title_el is None and el.name in title_tags:
+            title_el = el
+        if link_el is None and el.name == "a" and el.get("href") is not None:
+            link_el = el
+        classes = _class_string(el.get("class"))
+        if classes:
+            if want_company and company_el is None and "company" in classes:
+                company_el = el
+            if loc_el is None and "location" in classes:
+                loc_el = el
+        if title_el and link_el and loc_el and (company_el or not want_company):
+            break
+    return title_el, link_el, company_el, loc_el
+
+
+def teamwork_cards(html: str) -> list[tuple[str, str, str, str]]:
+    """(title, href, company, location) for each card on a TeamWork Online page."""
+    soup = BeautifulSoup(html, PARSER, parse_only=TEAMWORK_STRAINER)
+    cards = (
+        soup.find_all("li", class_=_JOB_RE)
+        or soup.find_all("article")
+        or soup.select(".job-post")
+    )
+    results = []
+    for card in cards:
+        title_el, link_el, company_el, loc_el = _scan_card(card, TEAMWORK_TITLE_TAGS, True)
+        if not title_el:
+            continue
+        results.append((
+            title_el.get_text(strip=True),
+            link_el["href"] if link_el else "",
+            company_el.get_text(strip=True) if company_el else "",
+            loc_el.get_text(strip=True) if loc_el else "",
+        ))
+    return results
+
+
+def icims_cards(html: str) -> list[tuple[str, str, str]]:
+    """(title, href, location) for each card on an iCIMS search page."""
+    soup = BeautifulSoup(html, PARSER, parse_only=ICIMS_STRAINER)
+    cards = soup.find_all("div", class_=_ICIMS_CARD_RE) or soup.find_all("li", class_=_JOB_RE)
+    results = []
+    for card in cards:
+        title_el, link_el, _, loc_el = _scan_card(card, ICIMS_TITLE_TAGS, False)
+        if not title_el:
+            continue
+        results.append((
+            title_el.get_text(strip=True),
+            link_el["href"] if link_el else "",
+            loc_el.get_text(strip=True) if loc_el else "",
+        ))
+    return results
@@ -0,0 +1,93 @@
+"""
+http_client.py — Shared HTTP session for every fetcher.
+
+One pooled requests.Session keeps connections to each ATS host alive across
+pages and companies instead of opening a fresh connection per request, and
+gives us a single place to hook transport-level behaviour (the offline
+benchmark mounts its mock server here), per-host rate limiting, request
+metrics and the circuit breaker.
+"""
+
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import circuit_breaker
+import metrics
+import rate_limiter
+
+# Statuses that count against an endpoint besides 5xx: a retired board or
+# a wrong Workday host usually answers 404/410 rather than timing out.
+FAILURE_STATUSES = (404, 410)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to an endpoint whose circuit is open."""
+
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=8)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+
+
+def endpoint_key(url: str) -> str:
+    """Circuit breaker key for a URL: host + path, query string ignored."""
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def request(method: str, url: str, endpoint: str | None = None,
+            failure_statuses: tuple = FAILURE_STATUSES, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session.
+
+    `endpoint` overrides the circuit breaker key (e.g. a bare host for
+    per-job URLs). `failure_statuses` are the non-5xx statuses that count
+    as an endpoint failure; pass () where a 404 is an expected answer.
+    Raises CircuitOpenError without sending if the endpoint is being skipped.
+    """
+    key = endpoint or endpoint_key(url)
+    host = urlsplit(url).netloc
+    if not circuit_breaker.allow(key):
+        metrics.record_skip(url)
+        raise CircuitOpenError(f"circuit open for {key}")
+    rate_limiter.acquire(host, min_interval=circuit_breaker.host_delay(host))
+
+    start = time.perf_counter()
+    try:
+        resp = session.request(method, url, **kwargs)
+    except requests.RequestException as exc:
+        metrics.record_request(url, None, time.perf_counter() - start, 0)
+        circuit_breaker.record_failure(key, f"{type(exc).__name__}: {exc}")
+        raise
+    # A streamed body is counted by whoever reads it (metrics.record_bytes);
+    # callers often stop early, so Content-Length would overstate it
+    size = 0 if kwargs.get("stream") else len(resp.content)
+    latency = time.perf_counter() - start
+    metrics.record_request(url, resp.status_code, latency, size)
+
+    if resp.status_code == 429:
+        circuit_breaker.record_rate_limited(key, host, _retry_after(resp))
+    elif resp.status_code >= 500 or resp.status_code in failure_statuses:
+        circuit_breaker.record_failure(key, f"HTTP {resp.status_code}")
+    else:
+        circuit_breaker.record_success(key, host, latency)
+    return resp
+
+
+def _retry_after(resp: requests.Response) -> float | None:
+    try:
+        return float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
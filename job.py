@@ -0,0 +1,58 @@
+"""
+job.py — The Job record every fetcher produces.
+
+A Job holds its seven fields in __slots__ instead of a per-instance dict,
+which makes it several times smaller than the equivalent dict. company,
+location and source come from a small set of values repeated across
+thousands of jobs, so they are interned and every job shares one string
+object per value.
+
+Jobs are converted to plain dicts only at the edges: JSON (all_jobs.json,
+the Slack outbox payload) via to_dict() / from_dict(), and SQLite via
+attribute access in db.py.
+"""
+
+import sys
+
+_intern = sys.intern
+
+
+class Job:
+    __slots__ = ("id", "title", "company", "location", "url", "source", "posted_on")
+
+    def __init__(self, id: str, title: str, company: str, location: str = "",
+                 url: str = "", source: str = "", posted_on: str = ""):
+        self.id = id
+        self.title = title
+        self.company = _intern(company or "")
+        self.location = _intern(location or "")
+        self.url = url or ""
+        self.source = _intern(source or "")
+        self.posted_on = posted_on or ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        """Build a Job from its JSON form. Unknown keys are ignored."""
+        return cls(
+            data["id"],
+            data.get("title", ""),
+            data.get("company", ""),
+            data.get("location", ""),
+            data.get("url", ""),
+            data.get("source", ""),
+            data.get("posted_on", ""),
+        )
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, Job):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Job({self.id!r}, {self.title!r}, {self.company!r})"
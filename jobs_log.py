@@ -0,0 +1,130 @@
+"""
+jobs_log.py — Streaming reader/writer for all_jobs.json.
+
+The file stays a plain JSON array, so the dashboard, the Actions cache and
+anything else reading it keeps working. It is written with one job object
+per line instead of indent=2:
+
+    [
+    {"id": "...", "title": "...", ...},
+    {"id": "...", "title": "...", ...}
+    ]
+
+iter_jobs() decodes the array one object at a time from fixed-size chunks,
+so the whole list is never held in memory. It reads the old indent=2
+layout just as well, and such a file is rewritten in the new layout the
+next time it is saved. append_jobs() adds jobs in place by rewriting only
+the closing bracket. Jobs go in and come out as job.Job records.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from job import Job
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_SEPARATORS = _WHITESPACE + ","
+
+
+def iter_jobs(path: Path) -> Iterator[Job]:
+    """Yield each job in the JSON array at `path`. Nothing if it doesn't exist."""
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        buf = f.read(CHUNK_SIZE).lstrip(_WHITESPACE)
+        if not buf:
+            return
+        if buf[0] != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            # Skip separators; refill if the buffer runs dry
+            while pos < len(buf) and buf[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: truncated JSON array")
+                buf, pos = f.read(CHUNK_SIZE), 0
+                eof = not buf
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                job, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(CHUNK_SIZE)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield Job.from_dict(job)
+            pos = end
+
+
+def _line(job: Job) -> str:
+    return json.dumps(job.to_dict(), ensure_ascii=False)
+
+
+def write_jobs(path: Path, jobs: Iterable[Job]) -> int:
+    """
+    Replace `path` with `jobs`, written one at a time. The file is swapped in
+    atomically, so `jobs` may be a generator over iter_jobs(path) itself.
+    Returns the number of jobs written.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+        for job in jobs:
+            f.write(",\n" if count else "\n")
+            f.write(_line(job))
+            count += 1
+        f.write("\n]\n")
+    os.replace(tmp, path)
+    return count
+
+
+def append_jobs(path: Path, jobs: list[Job]) -> int:
+    """Append `jobs` to the array at `path` without reading it. Returns len(jobs)."""
+    path = Path(path)
+    if not jobs:
+        return 0
+    if not path.exists() or path.stat().st_size == 0:
+        return write_jobs(path, jobs)
+    with open(path, "rb+") as f:
+        # Walk back over trailing whitespace to the closing bracket
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            f.seek(pos - 1)
+            ch = f.read(1)
+            if ch not in b" \t\r\n":
+                break
+            pos -= 1
+        if ch != b"]":
+            raise ValueError(f"{path}: expected a JSON array")
+        close = pos - 1
+        # Is the array empty? Look at the last character before "]"
+        pos = close
+        while pos > 0:
+            f.seek(pos - 1)
+            ch = f.read(1)
+            if ch not in b" \t\r\n":
+                break
+            pos -= 1
+        empty = ch == b"["
+        f.seek(close)
+        f.truncate()
+        body = ",\n".join(_line(job) for job in jobs)
+        f.write((("\n" if empty else ",\n") + body + "\n]\n").encode("utf-8"))
+    return len(jobs)
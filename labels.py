@@ -0,0 +1,68 @@
+"""
+labels.py — Company emoji and source labels shared by the Slack notifier and
+the dashboard.
+
+The company matcher is compiled once at import and memoized per company
+name, so rendering thousands of jobs never rescans COMPANY_EMOJI.
+"""
+
+import re
+from functools import lru_cache
+
+COMPANY_EMOJI = {
+    "Nike": "swoosh",
+    "Adidas": "3️⃣",
+    "New Balance": "🔵",
+    "Puma": "🐆",
+    "Wilson": "🎾",
+    "Under Armour": "🛡️",
+    "On Running": "⚡",
+    "Hoka": "🏔️",
+    "Brooks Running": "🏃",
+    "lululemon": "🧘",
+    "Arc'teryx": "🧗",
+    "Patagonia": "🌊",
+    "Default": "👟",
+}
+
+# One alternation over every brand name, to rule out most companies
+# (leagues, teams, agencies) with a single scan
+_COMPANY_RE = re.compile(
+    "|".join(re.escape(name) for name in COMPANY_EMOJI if name != "Default"),
+    re.IGNORECASE,
+)
+
+# source -> (label, dashboard badge class)
+SOURCE_LABELS = {
+    "jsearch_api": ("Job Board", "badge-api"),
+    "teamwork_online": ("TeamWork Online", "badge-teamwork"),
+}
+DEFAULT_SOURCE_LABEL = ("Career Page", "badge-workday")
+
+# Slack only tells job boards from everything else
+SLACK_SOURCE_LABELS = {"jsearch_api": "Job Board"}
+DEFAULT_SLACK_SOURCE_LABEL = "Career Page"
+
+
+@lru_cache(maxsize=None)
+def company_emoji(company: str) -> str:
+    """
+    Emoji for the brand names in `company`; when it names several, the one
+    listed first in COMPANY_EMOJI wins.
+    """
+    if not _COMPANY_RE.search(company or ""):
+        return COMPANY_EMOJI["Default"]
+    company = company.lower()
+    return next(
+        emoji for name, emoji in COMPANY_EMOJI.items() if name.lower() in company
+    )
+
+
+def source_label(source: str) -> tuple[str, str]:
+    """Human label and badge CSS class for a job source, for the dashboard."""
+    return SOURCE_LABELS.get(source, DEFAULT_SOURCE_LABEL)
+
+
+def slack_source_label(source: str) -> str:
+    """Label for a job source in Slack messages."""
+    return SLACK_SOURCE_LABELS.get(source, DEFAULT_SLACK_SOURCE_LABEL)
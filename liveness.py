@@ -0,0 +1,334 @@
+"""
+liveness.py — Is a job posting still up?
+
+Postings from an ATS we know are checked against that ATS's own per-job
+endpoint, which answers 404 once the posting is closed:
+
+- Greenhouse       api.greenhouse.io/v1/boards/{token}/jobs/{id}
+- Lever            api.lever.co/v0/postings/{company}/{id}
+- SmartRecruiters  api.smartrecruiters.com/v1/companies/{company}/postings/{id}
+- Workday          {tenant}.wdN.myworkdayjobs.com/wday/cxs/{tenant}/{site}/job/...
+
+Only the status matters, and the JSON body is a few KB instead of a full
+careers page. It is still read in full so the connection goes back to the
+pool for the next probe.
+
+Everything else (iCIMS, TeamWork Online, JSearch apply links) gets the
+generic check, which reads only the first READ_BYTES of the page. Many
+careers sites answer a closed job with a 200 "no longer available" page,
+so besides the status and where redirects ended up, that first chunk is
+matched against:
+
+- DEAD_PAGE_PHRASES, the same for every site, in the page's visible text
+- per-domain signatures learned from pages found dead: the page <title>
+  and the redirect target, with IDs masked. They live in jobs_seen.db
+  (dead_signatures) along with how often each was seen on a live page.
+
+Signatures are only learned from pages judged by the fixed rules (status,
+redirect to a careers page, phrases), never from a verdict a signature
+made itself, so a wrong signature can't keep confirming itself. A title
+seen on a live page is never used: many sites give every page the same
+<title>. A title also only decides once the domain has shown several live
+pages, none with that title, so it can't fire before we know what the
+domain's live pages look like.
+"""
+
+import html
+import re
+from urllib.parse import urlsplit
+
+import requests
+
+import db
+import http_client
+import metrics
+from job import Job
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+# If a URL redirects to any of these, the job is gone
+DEAD_URL_SIGNALS = [
+    "/jobs",
+    "/careers",
+    "/search",
+    "?q=",
+    "no-longer",
+    "expired",
+    "not found",
+    "job-not-found",
+]
+
+# Per-job API answers that mean the posting was taken down
+GONE_STATUSES = (404, 410)
+
+# Text that marks a "soft 404": a 200 page saying the job is gone
+DEAD_PAGE_PHRASES = [
+    "job is no longer available",
+    "position is no longer available",
+    "posting is no longer available",
+    "no longer accepting applications",
+    "this job has expired",
+    "job posting has expired",
+    "position has been filled",
+    "this job is closed",
+    "requisition is no longer",
+]
+
+# Only this much of a page is read. The <title> and most "job closed"
+# banners are near the top; the rest of the page is never downloaded.
+READ_BYTES = 32 * 1024
+
+# A learned signature decides on its own once this many dead pages on the
+# domain have shown it. A redirect target must also outnumber the live
+# pages that ended there by DEAD_RATIO to one; a title must never have been
+# seen on a live page, and the domain must have shown TITLE_MIN_LIVE live
+# pages first.
+TITLE_MIN_DEAD = 3
+TITLE_MIN_LIVE = 3
+REDIRECT_MIN_DEAD = 2
+DEAD_RATIO = 3
+
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+_DIGITS_RE = re.compile(r"\d+")
+_ID_TOKEN_RE = re.compile(r"[0-9a-f]{8,}(?:-[0-9a-f]{4,})*", re.I)
+_INVISIBLE_RE = re.compile(r"<(script|style|noscript)\b.*?(?:</\1\s*>|$)", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+_signatures: dict[str, dict] = {}
+
+
+# ── Generic ───────────────────────────────────────────────────────────────────
+
+def _read_head(url: str, resp: requests.Response, limit: int = READ_BYTES) -> str:
+    """
+    Up to `limit` bytes of the body, decoded. Closes the response and
+    counts the bytes read against `url` in metrics.
+    """
+    chunks = []
+    size = 0
+    try:
+        for chunk in resp.iter_content(8192):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit:
+                break
+    except requests.RequestException:
+        pass
+    finally:
+        resp.close()
+        metrics.record_bytes(url, size)
+    return b"".join(chunks)[:limit].decode(resp.encoding or "utf-8", errors="replace")
+
+
+def _title_pattern(head: str) -> str:
+    """The page <title>, lowercased, with numbers masked. "" if none."""
+    m = _TITLE_RE.search(head)
+    if not m:
+        return ""
+    title = html.unescape(" ".join(m.group(1).split())).lower()
+    return _DIGITS_RE.sub("#", title)[:200]
+
+
+def _visible_text(head: str) -> str:
+    """The text a visitor would read: scripts, styles and tags removed, lowercased."""
+    text = _TAG_RE.sub(" ", _INVISIBLE_RE.sub(" ", head))
+    return " ".join(html.unescape(text).split()).lower()
+
+
+def _redirect_pattern(url: str, final_url: str) -> str:
+    """Host + path a redirect ended on, with IDs masked. "" if not redirected."""
+    if final_url.rstrip("/") == url.rstrip("/"):
+        return ""
+    parts = urlsplit(final_url)
+    path = _DIGITS_RE.sub("#", _ID_TOKEN_RE.sub("*", parts.path.lower()))
+    return parts.netloc.lower() + path
+
+
+def _learned(domain: str) -> dict:
+    if domain not in _signatures:
+        _signatures[domain] = db.dead_signatures(domain)
+    return _signatures[domain]
+
+
+def _is_learned_dead(domain: str, kind: str, pattern: str) -> bool:
+    if not pattern:
+        return False
+    learned = _learned(domain)
+    dead, live = learned.get((kind, pattern), (0, 0))
+    if kind == "redirect":
+        return dead >= REDIRECT_MIN_DEAD and dead >= DEAD_RATIO * live
+    live_pages = sum(counts[1] for (k, _), counts in learned.items() if k == "title")
+    return dead >= TITLE_MIN_DEAD and live == 0 and live_pages >= TITLE_MIN_LIVE
+
+
+def _learn(domain: str, dead: bool, **patterns):
+    """
+    Count this page's title / redirect patterns as dead or live for
+    `domain`. Only call this for verdicts the fixed rules made.
+    """
+    learned = _learned(domain)
+    for kind, pattern in patterns.items():
+        if not pattern:
+            continue
+        counts = learned.setdefault((kind, pattern), [0, 0])
+        if dead and kind == "title" and counts[1]:
+            # Also on live pages: a site-wide title, useless as a signal
+            continue
+        counts[0 if dead else 1] += 1
+        db.record_signature(domain, kind, pattern, dead)
+
+
+def _looks_dead(url: str, resp: requests.Response) -> bool:
+    if resp.status_code == 404:
+        return True
+    # If we got redirected to a generic search/careers page, job is gone
+    final_url = resp.url.lower()
+    if any(signal in final_url for signal in DEAD_URL_SIGNALS):
+        # Make sure the final URL is meaningfully different from the original
+        if len(final_url) < len(url) * 0.8:
+            return True
+    return False
+
+
+def check_url(url: str) -> str:
+    """
+    "active" if the job URL still appears to be a live posting, "expired"
+    if it is gone, "error" if we couldn't tell. Errors never remove a job.
+
+    Reads at most READ_BYTES of the page. Besides 404s and redirects to a
+    generic careers page, a page is dead if its visible text says so
+    (DEAD_PAGE_PHRASES), or if its <title> or redirect target matches a
+    signature learned for this domain (see the module docstring).
+    """
+    if not url:
+        return "active"
+    domain = urlsplit(url).netloc.lower()
+    try:
+        # One circuit per host; a 404 here means the job is gone, not the site
+        resp = http_client.get(
+            url,
+            headers=HEADERS,
+            timeout=10,
+            allow_redirects=True,
+            stream=True,
+            endpoint=domain,
+            failure_statuses=(),
+        )
+    except requests.RequestException:
+        # Network error — assume still active to be safe
+        return "error"
+
+    redirect = _redirect_pattern(url, resp.url)
+    if _is_learned_dead(domain, "redirect", redirect):
+        # Not learned from: only the fixed rules below teach signatures
+        resp.close()
+        return "expired"
+
+    if resp.status_code >= 400 and resp.status_code not in GONE_STATUSES:
+        resp.close()
+        return "error"
+
+    head = _read_head(url, resp)
+    title = _title_pattern(head)
+    text = _visible_text(head)
+    if (
+        resp.status_code in GONE_STATUSES
+        or _looks_dead(url, resp)
+        or any(phrase in text for phrase in DEAD_PAGE_PHRASES)
+    ):
+        _learn(domain, True, title=title, redirect=redirect)
+        return "expired"
+    if _is_learned_dead(domain, "title", title):
+        return "expired"
+
+    _learn(domain, False, title=title, redirect=redirect)
+    return "active"
+
+
+# ── ATS endpoints ─────────────────────────────────────────────────────────────
+
+def _greenhouse(job: Job) -> str | None:
+    token, _, posting_id = job.id[len("gh-"):].rpartition("-")
+    if not token or not posting_id:
+        return None
+    return f"https://api.greenhouse.io/v1/boards/{token}/jobs/{posting_id}"
+
+
+def _smartrecruiters(job: Job) -> str | None:
+    company_id, _, posting_id = job.id[len("sr-"):].rpartition("-")
+    if not company_id or not posting_id:
+        return None
+    return f"https://api.smartrecruiters.com/v1/companies/{company_id}/postings/{posting_id}"
+
+
+def _lever(job: Job) -> str | None:
+    # jobs.lever.co/{company}/{posting id}; the posting ID is a UUID, so the
+    # job ID can't be split reliably
+    parts = urlsplit(job.url)
+    segments = parts.path.strip("/").split("/")
+    if parts.netloc != "jobs.lever.co" or len(segments) < 2:
+        return None
+    return f"https://api.lever.co/v0/postings/{segments[0]}/{segments[1]}"
+
+
+def _workday(job: Job) -> str | None:
+    # {tenant}.wdN.myworkdayjobs.com/[locale/]{site}/job/... -> the cxs detail
+    parts = urlsplit(job.url)
+    if not parts.netloc.endswith(".myworkdayjobs.com"):
+        return None
+    segments = parts.path.strip("/").split("/")
+    if "job" not in segments:
+        return None
+    at = segments.index("job")
+    if at == 0:
+        return None
+    tenant = parts.netloc.split(".")[0]
+    site = segments[at - 1]
+    path = "/".join(segments[at:])
+    return f"https://{parts.netloc}/wday/cxs/{tenant}/{site}/{path}"
+
+
+PROBES = {
+    "gh-": _greenhouse,
+    "sr-": _smartrecruiters,
+    "lever-": _lever,
+    "wd-": _workday,
+}
+
+
+def api_url(job: Job) -> str | None:
+    """The ATS per-job endpoint for `job`, or None to use the generic check."""
+    for prefix, probe in PROBES.items():
+        if job.id.startswith(prefix):
+            return probe(job)
+    return None
+
+
+def _check_api(url: str) -> str:
+    try:
+        resp = http_client.get(
+            url,
+            headers={**HEADERS, "Accept": "application/json"},
+            timeout=10,
+            endpoint=urlsplit(url).netloc,
+            failure_statuses=(),
+        )
+    except requests.RequestException:
+        return "error"
+    if resp.status_code in GONE_STATUSES:
+        return "expired"
+    return "active" if resp.status_code < 400 else "error"
+
+
+def check(job: Job) -> str:
+    """Status of one job ("active", "expired" or "error"), by the cheapest reliable route."""
+    url = api_url(job)
+    if url is None:
+        return check_url(job.url)
+    return _check_api(url)
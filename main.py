@@ -2,15 +2,29 @@
 main.py -- Footwear Job Tracker
 """
 
-import json
+import argparse
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 
+import circuit_breaker
+import db
+import jobs_log
+import metrics
+import profiling
+import retention
+import sharding
+import tasks
+from brand_scrapers import fetch_all_brand_jobs
 from scraper import scrape_all_companies
 from api_fetcher import fetch_all_api_jobs
-from db import init_db, is_new_job, mark_job_seen
-from notifier import send_jobs_to_slack
-from generate_dashboard import load_jobs, generate
+from db import init_db, is_new_job, mark_job_seen, save_seen_filter, touch_listed
+from notifier import start_outbox_sender
+from config import FETCH_BRAND_ATS, FETCH_MODE
+from filters import FilterSpec
+from generate_dashboard import OUTPUT, load_jobs, generate
+from job import Job
+from sharding import ALL, PARTIALS_DIR, Shard
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,61 +36,268 @@ logger = logging.getLogger(__name__)
 JOBS_LOG = Path(__file__).parent / "all_jobs.json"
 
 
-def load_existing_jobs():
-    if not JOBS_LOG.exists():
-        return []
-    with open(JOBS_LOG) as f:
-        return json.load(f)
+def save_jobs(jobs):
+    jobs_log.write_jobs(JOBS_LOG, jobs)
 
 
-def save_jobs(jobs):
-    with open(JOBS_LOG, "w") as f:
-        json.dump(jobs, f, indent=2)
+@contextmanager
+def _phase(name):
+    """Time a top-level phase, and profile it when --profile is on."""
+    with metrics.phase(name), profiling.phase(name):
+        yield
 
 
-def run():
-    logger.info("=" * 60)
-    logger.info("Footwear Job Tracker - starting run")
-    logger.info("=" * 60)
+def _fetch(record, shard: Shard = ALL):
+    """Phases 1-3: run every fetcher (or `shard`'s share) through `record`."""
+    # Phase 1: Brand ATS boards (Workday, Greenhouse, SmartRecruiters, ...)
+    if FETCH_BRAND_ATS:
+        logger.info("Phase 1: Fetching brand career boards...")
+        with _phase("fetch_brand_ats"):
+            for job in fetch_all_brand_jobs(shard=shard):
+                record(job)
+    else:
+        logger.info("Phase 1: Brand career boards off (set FETCH_BRAND_ATS=1)")
+
+    # Phase 2: Scraper (TeamWork Online)
+    logger.info("Phase 2: Scraping career pages...")
+    with _phase("fetch_career_pages"):
+        for job in scrape_all_companies(shard=shard):
+            record(job)
+
+    # Phase 3: JSearch API
+    logger.info("Phase 3: Fetching from JSearch API...")
+    with _phase("fetch_jsearch"):
+        for job in fetch_all_api_jobs(shard=shard):
+            record(job)
 
-    init_db()
-    new_jobs = []
 
-    # Phase 1: Scraper (TeamWork Online)
-    logger.info("Phase 1: Scraping career pages...")
-    for job in scrape_all_companies():
-        if is_new_job(job["id"]):
-            mark_job_seen(job)
-            new_jobs.append(job)
-            logger.info("  NEW  [%s] %s @ %s", job["source"], job["title"], job["company"])
-
-    # Phase 2: JSearch API
-    logger.info("Phase 2: Fetching from JSearch API...")
-    for job in fetch_all_api_jobs():
-        if is_new_job(job["id"]):
-            mark_job_seen(job)
-            new_jobs.append(job)
-            logger.info("  NEW  [%s] %s @ %s", job["source"], job["title"], job["company"])
-
-    # Phase 3: Update dashboard
-    logger.info("Phase 3: Updating job log and dashboard...")
-    all_jobs = load_existing_jobs()
-    all_jobs.extend(new_jobs)
-    save_jobs(all_jobs)
+def _finish(new_jobs, listed_ids, sender, report_extra=None):
+    """Phases 4-5: job log, retention, dashboard, Slack, run report."""
+    # Phase 4: Update dashboard
+    logger.info("Phase 4: Updating job log and dashboard...")
+    with _phase("save_log"):
+        jobs_log.append_jobs(JOBS_LOG, new_jobs)
     logger.info("Logged %d new job(s) to all_jobs.json", len(new_jobs))
-    generate(load_jobs())
+    with _phase("retention"):
+        # Jobs still on the dashboard count as listed even if this run's
+        # delta fetch didn't reach them
+        listed_ids.update(job.id for job in jobs_log.iter_jobs(JOBS_LOG))
+        touch_listed(listed_ids)
+        retention.run()
+    with _phase("dashboard"):
+        generate(load_jobs())
     logger.info("Dashboard regenerated.")
 
-    # Phase 4: Notify
-    logger.info("Phase 4: Sending notifications...")
+    # Phase 5: Notify
+    logger.info("Phase 5: Sending notifications...")
     if new_jobs:
         logger.info("Found %d new job(s).", len(new_jobs))
-        send_jobs_to_slack(new_jobs)
     else:
         logger.info("No new jobs this run.")
+    if sender:
+        with _phase("notify"):
+            sender.stop()
+        logger.info("Delivered %d Slack notification(s) this run.", sender.sent)
 
+    save_seen_filter()
+    circuit_breaker.flush()
+    report = metrics.write_report(OUTPUT.parent, extra=report_extra)
+    logger.info("Run report written to %s", report)
     logger.info("Run complete.")
 
 
+def run():
+    logger.info("=" * 60)
+    logger.info("Footwear Job Tracker - starting run")
+    logger.info("=" * 60)
+
+    init_db()
+    new_jobs = []
+    listed_ids = set()
+
+    # Slack delivery runs in the background while we fetch
+    sender = start_outbox_sender()
+
+    def record_if_new(job):
+        listed_ids.add(job.id)
+        with metrics.phase("dedup"):
+            if not is_new_job(job.id) or not mark_job_seen(job, notify=sender is not None):
+                return
+        new_jobs.append(job)
+        if sender:
+            sender.wake()
+        logger.info("  NEW  [%s] %s @ %s", job.source, job.title, job.company)
+
+    _fetch(record_if_new)
+    _finish(new_jobs, listed_ids, sender)
+
+
+def run_shard(shard: Shard, directory: Path = PARTIALS_DIR) -> Path:
+    """
+    Fetch `shard`'s share and write it to a partial file; nothing is logged
+    or sent. Board watermarks and Workday facets are held in memory and only
+    reach jobs_seen.db through the merge, so a partial that is never merged
+    leaves no watermark past jobs nobody marked seen. Only circuit-breaker
+    health is written directly.
+    """
+    logger.info("=" * 60)
+    logger.info("Footwear Job Tracker - shard %s", shard)
+    logger.info("=" * 60)
+
+    init_db()
+    new_jobs = {}
+    listed_ids = set()
+
+    def record_if_new(job):
+        listed_ids.add(job.id)
+        with metrics.phase("dedup"):
+            if job.id in new_jobs or not is_new_job(job.id):
+                return
+        new_jobs[job.id] = job
+        logger.info("  NEW  [%s] %s @ %s", job.source, job.title, job.company)
+
+    with db.defer_board_writes() as boards:
+        _fetch(record_if_new, shard)
+
+    circuit_breaker.flush()
+    path = sharding.write_partial(
+        shard, list(new_jobs.values()), listed_ids, boards, metrics.snapshot(), directory,
+    )
+    logger.info("Shard %s: %d new job(s) written to %s", shard, len(new_jobs), path)
+    return path
+
+
+def merge(paths):
+    """
+    Fold shard partials into jobs_seen.db, all_jobs.json, the dashboard and
+    the Slack outbox. Partials already merged are skipped.
+    """
+    logger.info("=" * 60)
+    logger.info("Footwear Job Tracker - merging shard results")
+    logger.info("=" * 60)
+
+    init_db()
+    new_jobs = []
+    listed_ids = set()
+    shard_reports = {}
+    sender = start_outbox_sender()
+
+    with _phase("merge"):
+        for path in sharding.partial_paths(paths):
+            partial = sharding.read_partial(path)
+            partial_id = partial["partial_id"]
+            if db.is_partial_merged(partial_id):
+                logger.info("  %s: already merged (%s), skipping", path.name, partial_id)
+                continue
+            added = []
+            for job in partial["new_jobs"]:
+                # Another shard (or an earlier run) may have had it first
+                if not is_new_job(job.id) or not mark_job_seen(job, notify=sender is not None):
+                    continue
+                added.append(job)
+                if sender:
+                    sender.wake()
+                logger.info("  NEW  [%s] %s @ %s", job.source, job.title, job.company)
+            db.apply_board_snapshot(partial.get("boards", {}))
+            db.mark_partial_merged(partial_id, len(added))
+            new_jobs.extend(added)
+            listed_ids.update(partial.get("listed_ids", []))
+            shard_reports[partial["shard"]] = partial.get("metrics", {})
+            logger.info("  %s: %d new job(s)", path.name, len(added))
+
+    _finish(new_jobs, listed_ids, sender, report_extra={"shards": shard_reports})
+
+
+def run_queued():
+    """
+    Like run(), but the fetches go through the task queue, so `main.py
+    --worker` processes started alongside share them.
+    """
+    logger.info("=" * 60)
+    logger.info("Footwear Job Tracker - starting queued run")
+    logger.info("=" * 60)
+
+    init_db()
+    sender = start_outbox_sender()
+
+    spec = FilterSpec.from_config()
+    delta = FETCH_MODE != "full"
+    if delta and db.get_meta("brand_filter", spec.key()) != spec.key():
+        logger.info("Job filter changed since last run - reading every board in full")
+        delta = False
+
+    with tasks.queued_run("fetch") as run_id:
+        queued = tasks.queue_fetches(run_id, delta=delta, notify=sender is not None)
+        logger.info("Queued %d fetch task(s) as run %s", queued, run_id)
+        with _phase("fetch_queued"):
+            tasks.work(run_id)
+        counts = db.task_counts(run_id)
+        if counts.get("failed"):
+            logger.warning("%d of %d task(s) failed", counts["failed"], queued)
+        results = tasks.collect(run_id, "fetch")
+
+    new_jobs = {}
+    listed_ids = set()
+    for result in results:
+        for data in result.get("new_jobs", []):
+            new_jobs.setdefault(data["id"], Job.from_dict(data))
+        listed_ids.update(result.get("listed_ids", []))
+    # Workers added seen IDs this process's filter doesn't have; rebuild it
+    db.reset_seen_filter()
+
+    _finish(list(new_jobs.values()), listed_ids, sender, report_extra={"tasks": counts})
+
+
+def work():
+    """Help with whatever queued runs are open, then exit."""
+    logger.info("Footwear Job Tracker - worker %s", tasks.worker_id())
+    init_db()
+    completed = tasks.work()
+    circuit_breaker.flush()
+    logger.info("Worker finished %d task(s); the queue is empty.", completed)
+
+
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Footwear Job Tracker")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="profile each phase with cProfile + tracemalloc",
+    )
+    parser.add_argument(
+        "--profile-dir", type=Path, default=profiling.ARTIFACTS_DIR,
+        help="where --profile writes its reports (default: artifacts/profile)",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--shard", type=Shard.parse, metavar="I/N",
+        help="fetch only shard I of N (1-based) and write a partial result file",
+    )
+    mode.add_argument(
+        "--merge", nargs="+", type=Path, metavar="PATH",
+        help="merge shard partial files (or directories of them) into the store",
+    )
+    mode.add_argument(
+        "--queue", action="store_true",
+        help="run through the task queue in jobs_seen.db, shared with --worker processes",
+    )
+    mode.add_argument(
+        "--worker", action="store_true",
+        help="work on queued tasks until the queue is empty",
+    )
+    parser.add_argument(
+        "--partials-dir", type=Path, default=PARTIALS_DIR,
+        help="where --shard writes its partial (default: partials/)",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile_dir)
+    if args.shard:
+        run_shard(args.shard, args.partials_dir)
+    elif args.merge:
+        merge(args.merge)
+    elif args.queue:
+        run_queued()
+    elif args.worker:
+        work()
+    else:
+        run()
@@ -0,0 +1,252 @@
+"""
+metrics.py — Per-run instrumentation.
+
+Records, for the current process:
+- per-host HTTP request counts by status, latency histograms, bytes and
+  errors (fed by http_client.request), and retries: requests re-sent by the
+  Workday facet fallback and the Slack outbox
+- per-phase durations for main.run (dedup, dashboard, notify, ...)
+- per-source durations and job counts (one entry per ATS board / query)
+
+write_report() dumps everything as JSON and in Prometheus text format so
+slow sources can be spotted and trended across runs.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+
+
+def _new_host():
+    return {
+        "requests": 0,
+        "status": defaultdict(int),
+        "errors": 0,
+        "retries": 0,
+        "skipped": 0,
+        "bytes": 0,
+        "latency_sum": 0.0,
+        "latency_max": 0.0,
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+
+_hosts: dict = defaultdict(_new_host)
+_phases: dict = {}
+_sources: dict = {}
+_started_at = time.time()
+
+
+def reset():
+    """Forget everything recorded so far (used between benchmark runs)."""
+    global _started_at
+    with _lock:
+        _hosts.clear()
+        _phases.clear()
+        _sources.clear()
+        _started_at = time.time()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc or "unknown"
+
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+def record_request(url: str, status: int | None, latency: float, size: int):
+    """Record one completed request. `status` is None when it raised."""
+    with _lock:
+        h = _hosts[_host(url)]
+        h["requests"] += 1
+        if status is None:
+            h["errors"] += 1
+        else:
+            h["status"][status] += 1
+            if status >= 400:
+                h["errors"] += 1
+        h["bytes"] += size
+        h["latency_sum"] += latency
+        h["latency_max"] = max(h["latency_max"], latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                h["buckets"][i] += 1
+                break
+        else:
+            h["buckets"][-1] += 1
+
+
+def record_bytes(url: str, size: int):
+    """Body bytes read from a streamed response to `url` (see http_client.request)."""
+    with _lock:
+        _hosts[_host(url)]["bytes"] += size
+
+
+def record_retry(url: str):
+    """A request to `url` that failed and is being (or will be) sent again."""
+    with _lock:
+        _hosts[_host(url)]["retries"] += 1
+
+
+def record_skip(url: str):
+    """A request not sent because the endpoint's circuit is open."""
+    with _lock:
+        _hosts[_host(url)]["skipped"] += 1
+
+
+# ── Phases and sources ────────────────────────────────────────────────────────
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a block of work. Repeated entries for the same name accumulate,
+    so per-job work like dedup can be wrapped call by call.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            p = _phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            p["seconds"] += elapsed
+            p["calls"] += 1
+
+
+def stream(name: str, items):
+    """
+    Pass a source's generator through, timing only the time spent inside it
+    (not the consumer's work between items) and counting what it yields.
+    The generator's return value is passed on, so `yield from` still sees it.
+    """
+    elapsed = 0.0
+    count = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                elapsed += time.perf_counter() - start
+            count += 1
+            yield item
+    finally:
+        with _lock:
+            s = _sources.setdefault(name, {"seconds": 0.0, "jobs": 0})
+            s["seconds"] += elapsed
+            s["jobs"] += count
+
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+
+def snapshot() -> dict:
+    """Everything recorded so far as plain JSON-serialisable data."""
+    with _lock:
+        hosts = {}
+        for name, h in sorted(_hosts.items()):
+            hosts[name] = {
+                "requests": h["requests"],
+                "status": {str(k): v for k, v in sorted(h["status"].items())},
+                "errors": h["errors"],
+                "retries": h["retries"],
+                "skipped": h["skipped"],
+                "bytes": h["bytes"],
+                "latency_avg_s": round(h["latency_sum"] / h["requests"], 4) if h["requests"] else 0.0,
+                "latency_max_s": round(h["latency_max"], 4),
+                "latency_sum_s": round(h["latency_sum"], 4),
+                "latency_buckets": dict(
+                    zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], h["buckets"])
+                ),
+            }
+        return {
+            "started_at": datetime.fromtimestamp(_started_at, timezone.utc).isoformat(),
+            "duration_s": round(time.time() - _started_at, 3),
+            "phases": {k: {"seconds": round(v["seconds"], 4), "calls": v["calls"]} for k, v in _phases.items()},
+            "sources": {
+                k: {"seconds": round(v["seconds"], 4), "jobs": v["jobs"]}
+                for k, v in sorted(_sources.items(), key=lambda kv: -kv[1]["seconds"])
+            },
+            "hosts": hosts,
+        }
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(data: dict) -> str:
+    """Render a snapshot() in Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+    hosts = data["hosts"]
+    metric("jobtracker_http_requests_total", "counter", "HTTP requests by host and status.", [
+        ({"host": host, "status": status}, n)
+        for host, h in hosts.items() for status, n in h["status"].items()
+    ])
+    metric("jobtracker_http_errors_total", "counter", "Failed HTTP requests (exceptions and 4xx/5xx).", [
+        ({"host": host}, h["errors"]) for host, h in hosts.items()
+    ])
+    metric("jobtracker_http_retries_total", "counter", "HTTP requests retried.", [
+        ({"host": host}, h["retries"]) for host, h in hosts.items()
+    ])
+    metric("jobtracker_http_skipped_total", "counter", "Requests skipped by the circuit breaker.", [
+        ({"host": host}, h["skipped"]) for host, h in hosts.items()
+    ])
+    metric("jobtracker_http_response_bytes_total", "counter", "Response body bytes received.", [
+        ({"host": host}, h["bytes"]) for host, h in hosts.items()
+    ])
+
+    name = "jobtracker_http_request_duration_seconds"
+    lines.append(f"# HELP {name} HTTP request latency.")
+    lines.append(f"# TYPE {name} histogram")
+    for host, h in hosts.items():
+        cumulative = 0
+        for bound, count in h["latency_buckets"].items():
+            cumulative += count
+            lines.append(f'{name}_bucket{{host="{_label(host)}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{host="{_label(host)}"}} {h["latency_sum_s"]}')
+        lines.append(f'{name}_count{{host="{_label(host)}"}} {h["requests"]}')
+
+    metric("jobtracker_phase_duration_seconds", "gauge", "Time spent in each run phase.", [
+        ({"phase": k}, v["seconds"]) for k, v in data["phases"].items()
+    ])
+    metric("jobtracker_source_duration_seconds", "gauge", "Time spent fetching each source.", [
+        ({"source": k}, v["seconds"]) for k, v in data["sources"].items()
+    ])
+    metric("jobtracker_source_jobs", "gauge", "Jobs returned by each source.", [
+        ({"source": k}, v["jobs"]) for k, v in data["sources"].items()
+    ])
+    metric("jobtracker_run_duration_seconds", "gauge", "Wall time of the run.", [({}, data["duration_s"])])
+    return "\n".join(lines) + "\n"
+
+
+def write_report(directory: Path, name: str = "run_report", extra: dict | None = None) -> Path:
+    """
+    Write <name>.json and <name>.prom into `directory`. Returns the JSON path.
+    `extra` keys (e.g. the shards' own snapshots) go into the JSON only.
+    """
+    data = snapshot()
+    json_path = Path(directory) / f"{name}.json"
+    with open(json_path, "w") as f:
+        json.dump({**data, **(extra or {})}, f, indent=2)
+    with open(Path(directory) / f"{name}.prom", "w") as f:
+        f.write(to_prometheus(data))
+    return json_path
@@ -1,111 +1,85 @@
 """
 notifier.py -- Sends Slack notifications for new jobs.
 If no Slack webhook is set, silently skips notification.
+
+New jobs are queued in the SQLite outbox (see db.py) and delivered by an
+OutboxSender thread, so Slack posts go out while the fetch phases are still
+running and a failed post is retried instead of lost.
 """
 
+import json
 import logging
+import random
+import threading
+import time
+from functools import lru_cache
+
 import requests
-from config import SLACK_WEBHOOK_URL
+from requests.adapters import HTTPAdapter
+
+import db
+import metrics
+from config import SLACK_DIGEST, SLACK_WEBHOOK_URL
+from job import Job
+from labels import company_emoji, slack_source_label
 
 logger = logging.getLogger(__name__)
 
-MAX_JOBS_PER_MESSAGE = 10
-
-COMPANY_EMOJI = {
-    "Nike": "swoosh",
-    "Adidas": "3️⃣",
-    "New Balance": "🔵",
-    "Puma": "🐆",
-    "Wilson": "🎾",
-    "Under Armour": "🛡️",
-    "On Running": "⚡",
-    "Hoka": "🏔️",
-    "Brooks Running": "🏃",
-    "lululemon": "🧘",
-    "Arc'teryx": "🧗",
-    "Patagonia": "🌊",
-    "Default": "👟",
-}
-
-
-def _get_emoji(company):
-    for name, emoji in COMPANY_EMOJI.items():
-        if name.lower() in company.lower():
-            return emoji
-    return COMPANY_EMOJI["Default"]
-
-
-def _job_block(job):
-    emoji = _get_emoji(job["company"])
-    location = job.get("location") or "Location not listed"
-    source = job.get("source", "")
-    source_label = "Job Board" if source == "jsearch_api" else "Career Page"
+# Slack message limits. Each payload is packed as full as these allow.
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_SECTION_CHARS = 3000
+SLACK_MAX_PAYLOAD_CHARS = 35000
+BLOCK_OVERHEAD_CHARS = 60  # JSON wrapper around each block's text
 
-    return [
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": (
-                    "%s *<%s|%s>*\n*%s*  -  %s  -  %s"
-                    % (emoji, job["url"], job["title"], job["company"], location, source_label)
-                ),
-            },
-        },
-        {"type": "divider"},
-    ]
+# How many queued jobs the sender looks at when packing a message
+OUTBOX_BATCH = 500
 
+# Slack allows roughly one incoming-webhook message per second
+SLACK_MIN_INTERVAL = 1.0
 
-def _build_payload(jobs):
-    header_blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "👟 %d New Job%s Found!" % (len(jobs), "s" if len(jobs) != 1 else ""),
-                "emoji": True,
-            },
-        },
-        {"type": "divider"},
-    ]
+# Failed batches are retried with exponential backoff: 5s, 10s, 20s, ...
+MAX_SEND_ATTEMPTS = 6
+BACKOFF_BASE = 5
+BACKOFF_MAX = 600
 
-    job_blocks = []
-    for job in jobs:
-        job_blocks.extend(_job_block(job))
 
-    return {"blocks": header_blocks + job_blocks}
+@lru_cache(maxsize=None)
+def _company_fragment(company):
+    """Rendered emoji + bold company name, built once per company."""
+    return company_emoji(company), "*%s*" % company
 
 
-def send_jobs_to_slack(jobs):
-    if not jobs:
-        logger.info("No new jobs to notify.")
-        return
+def _job_text(job: Job):
+    emoji, company = _company_fragment(job.company)
+    location = job.location or "Location not listed"
+    return "%s *<%s|%s>*\n%s  -  %s  -  %s" % (
+        emoji, job.url, job.title, company, location,
+        slack_source_label(job.source),
+    )
 
-    if not SLACK_WEBHOOK_URL:
-        logger.warning("SLACK_WEBHOOK_URL not set - skipping Slack notification.")
-        return
 
-    for i in range(0, len(jobs), MAX_JOBS_PER_MESSAGE):
-        chunk = jobs[i: i + MAX_JOBS_PER_MESSAGE]
-        payload = _build_payload(chunk)
-        try:
-            resp = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=10)
-            resp.raise_for_status()
-            logger.info(
-                "Slack notification sent for %d job(s) (batch %d).",
-                len(chunk),
-                i // MAX_JOBS_PER_MESSAGE + 1,
-            )
-        except requests.RequestException as exc:
-            logger.error("Failed to send Slack notification: %s", exc)
-def _build_payload(jobs: list[dict]) -> dict:
-    """Build the full Slack webhook payload for a list of jobs."""
-    header_blocks = [
+def _digest_line(job: Job):
+    emoji, _ = _company_fragment(job.company)
+    location = job.location or "Location not listed"
+    return "%s *<%s|%s>*  -  %s  -  %s" % (
+        emoji, job.url, job.title, job.company, location
+    )
+
+
+def _section(text):
+    return {
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": text[:SLACK_MAX_SECTION_CHARS]},
+    }
+
+
+def _header_blocks(count):
+    return [
         {
             "type": "header",
             "text": {
                 "type": "plain_text",
-                "text": f"👟 {len(jobs)} New Footwear Job{'s' if len(jobs) != 1 else ''} Found!",
+                "text": f"👟 {count} New Footwear Job{'s' if count != 1 else ''} Found!",
                 "emoji": True,
             },
         },
@@ -121,17 +95,176 @@ def _build_payload(jobs: list[dict]) -> dict:
         {"type": "divider"},
     ]
 
-    job_blocks = []
-    for job in jobs:
-        job_blocks.extend(_job_block(job))
 
-    return {"blocks": header_blocks + job_blocks}
+def _pack_payload(jobs: list[Job], digest: bool = SLACK_DIGEST) -> tuple[dict, int]:
+    """
+    Build one Slack webhook payload from the front of `jobs`, packing in as
+    many as fit under Slack's block and character limits.
+    Returns the payload and how many jobs it holds.
 
+    The default layout is one section + divider per job. The digest layout
+    puts as many jobs as fit into each section's mrkdwn, one per line.
+    """
+    block_budget = SLACK_MAX_BLOCKS - len(_header_blocks(0))
+    char_budget = SLACK_MAX_PAYLOAD_CHARS - len(json.dumps(_header_blocks(len(jobs))))
+    blocks = []
+    used = 0
+
+    if digest:
+        lines = []
+        section_chars = 0
+        for job in jobs:
+            line = _digest_line(job)[:SLACK_MAX_SECTION_CHARS]
+            cost = len(line) + 1
+            if lines and section_chars + cost > SLACK_MAX_SECTION_CHARS:
+                blocks.append(_section("\n".join(lines)))
+                char_budget -= section_chars + BLOCK_OVERHEAD_CHARS
+                lines, section_chars = [], 0
+            if len(blocks) >= block_budget:
+                break
+            if section_chars + cost + BLOCK_OVERHEAD_CHARS > char_budget:
+                break
+            lines.append(line)
+            section_chars += cost
+            used += 1
+        if lines:
+            blocks.append(_section("\n".join(lines)))
+    else:
+        for job in jobs:
+            text = _job_text(job)
+            cost = min(len(text), SLACK_MAX_SECTION_CHARS) + 2 * BLOCK_OVERHEAD_CHARS
+            if len(blocks) + 2 > block_budget or (used and cost > char_budget):
+                break
+            blocks.append(_section(text))
+            blocks.append({"type": "divider"})
+            char_budget -= cost
+            used += 1
+
+    return {"blocks": _header_blocks(used) + blocks}, used
 
-def send_jobs_to_slack(jobs: list[dict]):
+
+class OutboxSender(threading.Thread):
+    """
+    Background thread that drains the Slack outbox.
+    Posts one batch at a time over a pooled session, waits out Slack's
+    Retry-After on 429s, and backs off on other failures. Anything still
+    undelivered when the thread stops stays in the outbox for the next run.
+    """
+
+    def __init__(self, webhook_url: str = SLACK_WEBHOOK_URL):
+        super().__init__(name="slack-outbox", daemon=True)
+        self.webhook_url = webhook_url
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.sent = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._deadline = None
+        self._next_send_at = 0.0
+
+    def wake(self):
+        """Signal that new jobs were queued."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 120):
+        """Finish delivering what is queued (up to `timeout` seconds), then exit."""
+        self._deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout + 15)
+        left = db.count_pending_notifications(MAX_SEND_ATTEMPTS)
+        if left:
+            logger.warning("%d Slack notification(s) left in the outbox for the next run.", left)
+
+    def run(self):
+        while True:
+            if self._drain_once():
+                continue
+            if self._stopping.is_set():
+                if time.monotonic() >= self._deadline:
+                    return
+                if not db.count_pending_notifications(MAX_SEND_ATTEMPTS):
+                    return
+            self._wake.wait(timeout=1 if self._stopping.is_set() else 5)
+            self._wake.clear()
+
+    def _drain_once(self) -> bool:
+        """Send one due batch. Returns False when nothing was due."""
+        rows = db.pending_notifications(OUTBOX_BATCH, MAX_SEND_ATTEMPTS)
+        if not rows:
+            return False
+
+        payload, used = _pack_payload([Job.from_dict(json.loads(row["payload"])) for row in rows])
+        rows = rows[:used]
+        outbox_ids = [row["id"] for row in rows]
+        try:
+            resp = self._post(payload)
+            if resp.status_code == 429:
+                retry_after = _retry_after(resp)
+                logger.warning("Slack rate limit hit - waiting %.0fs", retry_after)
+                self._next_send_at = time.monotonic() + retry_after
+                metrics.record_retry(self.webhook_url)
+                return True
+            resp.raise_for_status()
+        except requests.RequestException as exc:
+            attempts = max(row["attempts"] for row in rows) + 1
+            if attempts >= MAX_SEND_ATTEMPTS:
+                logger.error(
+                    "Giving up on Slack notification for %d job(s): %s", used, exc
+                )
+                db.delete_notifications(outbox_ids)
+            else:
+                delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+                delay *= random.uniform(0.8, 1.2)
+                db.defer_notifications(outbox_ids, delay, str(exc))
+                metrics.record_retry(self.webhook_url)
+                logger.warning(
+                    "Failed to send Slack notification (attempt %d): %s - retrying in %.0fs",
+                    attempts, exc, delay,
+                )
+            return True
+
+        db.delete_notifications(outbox_ids)
+        self.sent += used
+        logger.info("Slack notification sent for %d job(s).", used)
+        return True
+
+    def _post(self, payload: dict) -> requests.Response:
+        wait = self._next_send_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return self.session.post(self.webhook_url, json=payload, timeout=10)
+        finally:
+            self._next_send_at = max(
+                self._next_send_at, time.monotonic() + SLACK_MIN_INTERVAL
+            )
+
+
+def _retry_after(resp: requests.Response) -> float:
+    try:
+        return max(float(resp.headers.get("Retry-After", "")), SLACK_MIN_INTERVAL)
+    except ValueError:
+        return 30.0
+
+
+def start_outbox_sender() -> OutboxSender | None:
+    """
+    Start draining the outbox in the background (including anything left
+    over from a previous run). Returns None if no Slack webhook is set.
+    """
+    if not SLACK_WEBHOOK_URL:
+        logger.warning("SLACK_WEBHOOK_URL not set - skipping Slack notification.")
+        return None
+    sender = OutboxSender()
+    sender.start()
+    return sender
+
+
+def send_jobs_to_slack(jobs: list[Job]):
     """
     Send a list of new jobs to Slack.
-    Automatically chunks into multiple messages if needed.
+    Queues them in the outbox and blocks until the outbox is drained.
     """
     if not jobs:
         logger.info("No new jobs to notify.")
@@ -141,21 +274,10 @@ def send_jobs_to_slack(jobs: list[dict]):
         logger.error("SLACK_WEBHOOK_URL is not set. Cannot send notification.")
         return
 
-    # Chunk into batches to stay within Slack's block limits
-    for i in range(0, len(jobs), MAX_JOBS_PER_MESSAGE):
-        chunk = jobs[i : i + MAX_JOBS_PER_MESSAGE]
-        payload = _build_payload(chunk)
-
-        try:
-            resp = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=10)
-            resp.raise_for_status()
-            logger.info(
-                "Slack notification sent for %d job(s) (batch %d).",
-                len(chunk),
-                i // MAX_JOBS_PER_MESSAGE + 1,
-            )
-        except requests.RequestException as exc:
-            logger.error("Failed to send Slack notification: %s", exc)
+    db.enqueue_notifications(jobs)
+    sender = OutboxSender()
+    sender.start()
+    sender.stop()
 
 
 def send_heartbeat(total_checked: int, new_found: int):
@@ -0,0 +1,72 @@
+"""
+parse_pool.py — Worker processes for CPU-bound page parsing.
+
+BeautifulSoup parsing holds the GIL, so parsing a listing page in the
+fetcher's own process stalls every other fetch thread until it's done.
+parse() hands the raw body to a worker process instead and gets back the
+plain tuples html_parsing returns, so only text goes out and small lists
+come back. While a worker parses one page, the fetch threads keep
+downloading the next ones.
+
+Workers are started on first use with forkserver (spawn where that isn't
+available) rather than fork: the parent already has threads running, e.g.
+the Slack outbox sender, and forking a threaded process can copy a held
+lock into the child.
+
+PARSE_WORKERS=0 parses inline. If the pool breaks (a worker killed by the
+OOM killer, say), parsing falls back to inline for the rest of the run.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import PARSE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_disabled = PARSE_WORKERS <= 0
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if _disabled:
+        return None
+    with _lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=context)
+        return _pool
+
+
+def parse(fn, body: str):
+    """fn(body), run in a worker process. `fn` must be a module-level function."""
+    global _disabled
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(fn, body).result()
+        except BrokenProcessPool:
+            logger.warning("Parse pool broke - parsing in-process from now on")
+            _disabled = True
+            shutdown()
+    return fn(body)
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,94 @@
+"""
+profiling.py — Opt-in per-phase profiling (the --profile flag).
+
+When enabled, each phase wrapped in profiling.phase(name) runs under
+cProfile and tracemalloc. The phase then leaves these files in the
+artifacts directory:
+
+    <name>.prof   raw cProfile stats (open with snakeviz / pstats)
+    <name>.txt    top functions by cumulative time + top allocation sites
+
+When disabled, phase() does nothing.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_DIR = Path(__file__).parent / "artifacts" / "profile"
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 8
+
+_output_dir: Path | None = None
+
+
+def enable(directory: Path = ARTIFACTS_DIR):
+    """Turn profiling on for the rest of the process."""
+    global _output_dir
+    _output_dir = Path(directory)
+    _output_dir.mkdir(parents=True, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    logger.info("Profiling enabled - writing phase profiles to %s", _output_dir)
+
+
+def is_enabled() -> bool:
+    return _output_dir is not None
+
+
+@contextmanager
+def phase(name: str):
+    """Profile one top-level phase. Phases must not be nested."""
+    if _output_dir is None:
+        yield
+        return
+
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        _dump(name, profiler, before, after, elapsed, peak)
+
+
+def _dump(name, profiler, before, after, elapsed, peak):
+    profiler.dump_stats(_output_dir / f"{name}.prof")
+
+    out = io.StringIO()
+    out.write(f"Phase: {name}\n")
+    out.write(f"Wall time: {elapsed:.3f}s   Peak traced memory: {peak / 1e6:.2f} MB\n\n")
+
+    out.write(f"── Top {TOP_FUNCTIONS} functions by cumulative time ──\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+    out.write(f"── Top {TOP_ALLOCATIONS} allocation sites (net growth during phase) ──\n")
+    allocation_filter = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    diffs = after.filter_traces(allocation_filter).compare_to(
+        before.filter_traces(allocation_filter), "lineno"
+    )
+    for diff in diffs[:TOP_ALLOCATIONS]:
+        out.write(f"{diff}\n")
+
+    report = _output_dir / f"{name}.txt"
+    report.write_text(out.getvalue())
+    logger.info("Profile for phase '%s' written to %s", name, report)
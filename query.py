@@ -0,0 +1,59 @@
+"""
+query.py — Search the job history in jobs_seen.db.
+
+    python query.py "marketing intern"
+    python query.py "product nike" --active --limit 20
+    python query.py 'title:design AND company:"new balance"' --raw
+    python query.py "co-op" --json
+
+Every job ever recorded is searchable, including ones that have expired from
+the dashboard, until retention.py compacts it. Results are ranked: title
+matches count most, then company, then location.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+
+from db import init_db, search_jobs
+
+
+def _print_table(results: list[dict]):
+    for job in results:
+        status = "expired" if job["expired_at"] else "active"
+        posted = (job["posted_on"] or job["seen_at"] or "")[:10]
+        print(f"{posted:<10}  {status:<7}  {job['title']} @ {job['company']}"
+              f"{' — ' + job['location'] if job['location'] else ''}")
+        if job["url"]:
+            print(f"{'':<19}  {job['url']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Full-text search over stored jobs")
+    parser.add_argument("query", help="words to match in title / company / location")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--active", action="store_true", help="skip jobs that have expired")
+    parser.add_argument("--raw", action="store_true", help="treat the query as FTS5 syntax")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    init_db()
+    try:
+        results = search_jobs(args.query, limit=args.limit, active_only=args.active, raw=args.raw)
+    except sqlite3.OperationalError as exc:
+        print(f"Bad query: {exc}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif results:
+        _print_table(results)
+    else:
+        print("No matching jobs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+rate_limiter.py — Shared per-host token-bucket rate limiter.
+
+Every request made through http_client takes a token from the bucket of
+the host it is going to. Each host refills at the rate configured for its
+ATS in config.RATE_LIMITS. A request therefore waits only when the same host
+was hit too recently, and requests to other hosts go straight through.
+
+On top of the bucket, a caller can ask for a minimum gap since the last
+request to the host. http_client passes the circuit breaker's adaptive
+delay here, so 429s and slow responses still slow that one host down.
+"""
+
+import threading
+import time
+
+from config import DEFAULT_RATE_LIMIT, RATE_LIMITS
+
+_enabled = True
+_lock = threading.Lock()
+_buckets: dict = {}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` stored."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.last_grant = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, min_interval: float = 0.0) -> float:
+        """Take one token. Returns how long the caller must wait before sending."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.last_grant + min_interval - now)
+            self.last_grant = now + wait
+            return wait
+
+
+def _limit_for(host: str) -> tuple[float, int]:
+    host = host.lower().split(":")[0]
+    for suffix, limit in RATE_LIMITS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return limit
+    return DEFAULT_RATE_LIMIT
+
+
+def bucket(host: str) -> TokenBucket:
+    with _lock:
+        b = _buckets.get(host)
+        if b is None:
+            b = _buckets[host] = TokenBucket(*_limit_for(host))
+        return b
+
+
+def acquire(host: str, min_interval: float = 0.0):
+    """Block until a request to `host` is allowed."""
+    if not _enabled:
+        return
+    wait = bucket(host).reserve(min_interval)
+    if wait > 0:
+        time.sleep(wait)
+
+
+def set_enabled(enabled: bool):
+    """Switch politeness off entirely (the offline benchmark's --no-sleep)."""
+    global _enabled
+    _enabled = enabled
@@ -0,0 +1,120 @@
+"""
+retention.py — Keeps jobs_seen.db small.
+
+The workflow restores and saves the whole DB through actions/cache on every
+run, so a table that only ever grows makes every run slower. After each run:
+
+- seen jobs not listed by any source for COMPACT_AFTER_DAYS move from
+  seen_jobs to seen_hashes, which keeps only a 64-bit hash of the ID
+  (enough for dedup) in a WITHOUT ROWID table
+- compacted jobs not listed for RETENTION_DAYS are deleted. If one of them
+  ever shows up again it is treated as new.
+- dead-page signatures (see liveness.py) not updated for RETENTION_DAYS
+  are dropped
+- finished queue tasks and runs (see tasks.py) older than TASK_KEEP_DAYS
+  are dropped
+- every VACUUM_EVERY_DAYS the file is rebuilt with VACUUM and re-analysed
+
+"Listed" means returned by a fetcher this run, or still in all_jobs.json
+after check_expired.py (see db.touch_listed).
+"""
+
+import argparse
+import logging
+import time
+
+import db
+from config import COMPACT_AFTER_DAYS, RETENTION_DAYS, TASK_KEEP_DAYS, VACUUM_EVERY_DAYS
+
+logger = logging.getLogger(__name__)
+
+_LISTED = "COALESCE(last_listed_at, seen_at)"
+
+
+def _cutoff(days: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - days * 86400))
+
+
+def compact(days: int = COMPACT_AFTER_DAYS) -> int:
+    """Move seen jobs not listed for `days` into seen_hashes. Returns the count."""
+    cutoff = _cutoff(days)
+    with db.get_connection() as conn:
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO seen_hashes (hash, last_listed_at)
+            SELECT id_hash(id), {_LISTED} FROM seen_jobs WHERE {_LISTED} < ?
+            """,
+            (cutoff,),
+        )
+        moved = conn.execute(f"DELETE FROM seen_jobs WHERE {_LISTED} < ?", (cutoff,)).rowcount
+        conn.commit()
+    return moved
+
+
+def prune(days: int = RETENTION_DAYS) -> int:
+    """Forget jobs not listed for `days`. Returns the count."""
+    cutoff = _cutoff(days)
+    with db.get_connection() as conn:
+        pruned = conn.execute(
+            "DELETE FROM seen_hashes WHERE last_listed_at < ?", (cutoff,)
+        ).rowcount
+        pruned += conn.execute(
+            f"DELETE FROM seen_jobs WHERE {_LISTED} < ?", (cutoff,)
+        ).rowcount
+        # Learned dead-page signatures of domains we no longer see
+        conn.execute(
+            "DELETE FROM dead_signatures WHERE updated_at < ?",
+            (time.time() - days * 86400,),
+        )
+        task_cutoff = time.time() - TASK_KEEP_DAYS * 86400
+        conn.execute(
+            "DELETE FROM tasks WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (task_cutoff,),
+        )
+        conn.execute("DELETE FROM task_runs WHERE heartbeat_at < ?", (task_cutoff,))
+        conn.commit()
+    if pruned:
+        db.reset_seen_filter()
+    return pruned
+
+
+def maintain(every_days: int = VACUUM_EVERY_DAYS, force: bool = False) -> bool:
+    """VACUUM + ANALYZE if the last one is older than `every_days`. True if run."""
+    last = float(db.get_meta("last_vacuum", "0"))
+    if not force and time.time() - last < every_days * 86400:
+        with db.get_connection() as conn:
+            conn.execute("PRAGMA optimize")
+        return False
+    start = time.perf_counter()
+    conn = db.get_connection()
+    try:
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    db.set_meta("last_vacuum", str(time.time()))
+    logger.info("Vacuumed jobs_seen.db in %.2fs", time.perf_counter() - start)
+    return True
+
+
+def run(force_vacuum: bool = False):
+    """Compact, prune and (on schedule) vacuum. Call after dedup."""
+    before = db.DB_PATH.stat().st_size if db.DB_PATH.exists() else 0
+    moved = compact()
+    pruned = prune()
+    maintain(force=force_vacuum)
+    after = db.DB_PATH.stat().st_size if db.DB_PATH.exists() else 0
+    logger.info(
+        "Retention: %d compacted, %d pruned, jobs_seen.db %.1f KB -> %.1f KB",
+        moved, pruned, before / 1024, after / 1024,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact and prune jobs_seen.db")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM now, regardless of schedule")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s")
+    db.init_db()
+    run(force_vacuum=args.vacuum)
@@ -8,9 +8,20 @@ on TeamWork Online and not on LinkedIn/Indeed.
 """
 
 import logging
-import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator
+
 import requests
-from bs4 import BeautifulSoup
+
+import db
+import html_parsing
+import http_client
+import metrics
+import parse_pool
+from config import TEAMWORK_CONCURRENCY, TEAMWORK_MAX_PAGES
+from filters import FilterSpec
+from job import Job
+from sharding import ALL, Shard
 
 logger = logging.getLogger(__name__)
 
@@ -33,88 +44,126 @@ def _is_retail(title: str) -> bool:
     return any(kw in t for kw in RETAIL_EXCLUDE)
 
 
-def scrape_teamwork_online(max_pages=5):
-    """Scrape TeamWork Online for sports industry jobs."""
+def _fetch_teamwork_cards(page: int) -> list[tuple] | None:
+    """Fetch one listing page and parse it in the parse pool. None if the fetch failed."""
+    url = f"https://www.teamworkonline.com/jobs-in-sports?page={page}"
+    try:
+        resp = http_client.get(url, headers=HEADERS, timeout=15)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        logger.warning("TeamWork Online page %d failed: %s", page, exc)
+        return None
+    return parse_pool.parse(html_parsing.teamwork_cards, resp.text)
+
+
+def _teamwork_page_jobs(cards: list[tuple],
+                        spec: FilterSpec) -> tuple[list[str], list[Job]] | None:
+    """
+    (IDs of all the page's cards, Jobs among them that match `spec`), or
+    None if the page has no cards. The IDs include filtered-out cards so
+    the seen-check still sees a page whose jobs were all filtered.
+    """
+    if not cards:
+        return None
+
+    card_ids = []
     jobs = []
+    for title, href, company, location in cards:
+        if not title:
+            continue
+
+        job_url = ""
+        if href:
+            job_url = (
+                href if href.startswith("http")
+                else f"https://www.teamworkonline.com{href}"
+            )
+        job_id = f"teamwork-{db.stable_hash(job_url)}"
+        card_ids.append(job_id)
+
+        if _is_retail(title) or not spec.title_matches(title):
+            continue
+        jobs.append(Job(
+            id=job_id,
+            title=title,
+            company=company or "Sports Organization",
+            location=location,
+            url=job_url,
+            source="teamwork_online",
+        ))
+    return card_ids, jobs
+
+
+def scrape_teamwork_online(max_pages=TEAMWORK_MAX_PAGES, concurrency=TEAMWORK_CONCURRENCY,
+                           stop_when_seen=True,
+                           spec: FilterSpec | None = None) -> Generator[Job, None, None]:
+    """
+    Scrape TeamWork Online for sports industry jobs, yielding each page's
+    jobs as soon as it is parsed.
+
+    Up to `concurrency` pages are in flight at once (fetched, then parsed in
+    the parse pool), but pages are processed in order. The crawl stops at
+    the first page that fails, has no cards, or (with stop_when_seen) has
+    jobs already in jobs_seen.db and none that are new and wanted, since
+    everything after it is older still. Listings carry no search or date
+    parameters, so `spec` keywords are only checked against each title;
+    filtered-out cards still count towards the seen-check.
+    """
+    spec = spec or FilterSpec.from_config()
+    count = 0
     seen_ids = set()
+    pending = {}
+    next_page = 1
 
-    for page in range(1, max_pages + 1):
-        url = f"https://www.teamworkonline.com/jobs-in-sports?page={page}"
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
-            resp.raise_for_status()
-        except requests.RequestException as exc:
-            logger.warning("TeamWork Online page %d failed: %s", page, exc)
-            break
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        job_cards = (
-            soup.find_all("li", class_=lambda c: c and "job" in c.lower())
-            or soup.find_all("article")
-            or soup.select(".job-post")
-        )
-
-        if not job_cards:
-            logger.info("TeamWork Online page %d - no cards found, stopping", page)
-            break
-
-        for card in job_cards:
-            title_el = card.find(["h2", "h3", "h4", "a"])
-            if not title_el:
-                continue
-            title = title_el.get_text(strip=True)
-            if not title or _is_retail(title):
-                continue
-
-            link_el = card.find("a", href=True)
-            job_url = ""
-            if link_el:
-                href = link_el["href"]
-                job_url = (
-                    href if href.startswith("http")
-                    else f"https://www.teamworkonline.com{href}"
-                )
-
-            company_el = card.find(
-                class_=lambda c: c and "company" in str(c).lower()
-            )
-            company = (
-                company_el.get_text(strip=True)
-                if company_el else "Sports Organization"
-            )
-
-            loc_el = card.find(
-                class_=lambda c: c and "location" in str(c).lower()
-            )
-            location = loc_el.get_text(strip=True) if loc_el else ""
-
-            job_id = f"teamwork-{abs(hash(job_url))}"
-            if job_id in seen_ids:
-                continue
-            seen_ids.add(job_id)
-
-            jobs.append({
-                "id": job_id,
-                "title": title,
-                "company": company,
-                "location": location,
-                "url": job_url,
-                "source": "teamwork_online",
-                "posted_on": "",
-            })
-
-    logger.info("TeamWork Online: %d jobs found", len(jobs))
-    return jobs
-
-
-def fetch_all_scraper_jobs():
-    """Run all supplementary scrapers."""
+            for page in range(1, max_pages + 1):
+                while next_page <= max_pages and len(pending) < concurrency:
+                    pending[next_page] = pool.submit(_fetch_teamwork_cards, next_page)
+                    next_page += 1
+
+                cards = pending.pop(page).result()
+                if cards is None:
+                    break
+
+                parsed = _teamwork_page_jobs(cards, spec)
+                if parsed is None:
+                    logger.info("TeamWork Online page %d - no cards found, stopping", page)
+                    break
+                card_ids, page_jobs = parsed
+
+                # Filtered-out cards are never marked seen, so they can't
+                # prove a page old on their own: stop once the page reaches
+                # jobs seen before and holds nothing new that we'd keep
+                if stop_when_seen and card_ids:
+                    seen = db.seen_ids(card_ids)
+                    if seen and all(job.id in seen for job in page_jobs):
+                        logger.info("TeamWork Online page %d - nothing new, stopping", page)
+                        break
+
+                for job in page_jobs:
+                    if job.id in seen_ids:
+                        continue
+                    seen_ids.add(job.id)
+                    count += 1
+                    yield job
+        finally:
+            # Also runs when the consumer stops early
+            for future in pending.values():
+                future.cancel()
+
+    logger.info("TeamWork Online: %d jobs found", count)
+
+
+def fetch_all_scraper_jobs(shard: Shard = ALL):
+    """Run all supplementary scrapers (those `shard` owns)."""
+    if not shard.owns("teamwork_online"):
+        return
     logger.info("Scraping TeamWork Online (sports industry)...")
-    for job in scrape_teamwork_online():
-        yield job
+    yield from metrics.stream("teamwork_online", scrape_teamwork_online())
 
 
-def scrape_all_companies(max_per_company=200):
+def scrape_all_companies(max_per_company=200, shard: Shard = ALL):
     """Alias used by main.py."""
-    for job in fetch_all_scraper_jobs():
+    for job in fetch_all_scraper_jobs(shard):
         yield job
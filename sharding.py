@@ -0,0 +1,108 @@
+"""
+sharding.py — Splitting one run across parallel workers.
+
+    python main.py --shard 1/3        # on each of three runners: 1/3, 2/3, 3/3
+    python main.py --merge partials/  # once, after all shards finished
+
+Every brand board, JSearch query and TeamWork Online belongs to exactly one
+of N shards, picked by a stable hash of its key, so a shard always gets the
+same share of the registry no matter which machine runs it. A shard fetches
+only what it owns, checks it against its copy of jobs_seen.db, and writes
+a partial file instead of touching the store, dashboard or Slack. Board
+watermarks, Workday facets and the brand filter key are held in memory
+(db.defer_board_writes) and travel in the partial; only circuit-breaker
+health is written to the shard's DB.
+
+    partials/shard-1-of-3.json
+    {"partial_id": ..., "shard": "1/3", "new_jobs": [...], "listed_ids": [...],
+     "boards": {watermarks, workday facets, db_meta}, "metrics": {...}}
+
+The merge folds each partial into jobs_seen.db, all_jobs.json and the Slack
+outbox. Partial IDs are recorded in merged_partials, so merging the same
+file twice is a no-op, and a job found by two shards is still new only once.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+from db import stable_hash
+from job import Job
+
+PARTIALS_DIR = Path(__file__).parent / "partials"
+
+
+class Shard:
+    __slots__ = ("index", "count")
+
+    def __init__(self, index: int = 1, count: int = 1):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"shard {index}/{count} out of range")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """Parse "2/4": the second of four shards (1-based)."""
+        index, sep, count = text.partition("/")
+        if not sep:
+            raise ValueError(f"expected i/N, got {text!r}")
+        return cls(int(index), int(count))
+
+    def owns(self, key: str) -> bool:
+        """True if the board / query named `key` is fetched by this shard."""
+        return self.count == 1 or int(stable_hash(key), 16) % self.count == self.index - 1
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+
+ALL = Shard()
+
+
+def run_id() -> str:
+    """Identifies one fan-out: the Actions run (and attempt) if there is one."""
+    if os.environ.get("GITHUB_RUN_ID"):
+        return f"gh-{os.environ['GITHUB_RUN_ID']}-{os.environ.get('GITHUB_RUN_ATTEMPT', '1')}"
+    return uuid.uuid4().hex
+
+
+def write_partial(shard: Shard, new_jobs: list[Job], listed_ids, boards: dict,
+                  metrics: dict, directory: Path = PARTIALS_DIR) -> Path:
+    """Write one shard's results. The file appears atomically."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"shard-{shard.index}-of-{shard.count}.json"
+    data = {
+        "partial_id": f"{run_id()}:{shard}",
+        "shard": str(shard),
+        "new_jobs": [job.to_dict() for job in new_jobs],
+        "listed_ids": sorted(listed_ids),
+        "boards": boards,
+        "metrics": metrics,
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def read_partial(path: Path) -> dict:
+    """A partial written by write_partial(), with new_jobs as Job records."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["new_jobs"] = [Job.from_dict(job) for job in data.get("new_jobs", [])]
+    return data
+
+
+def partial_paths(paths) -> list[Path]:
+    """Expand directories to the shard-*.json files in them."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(path.glob("shard-*.json")))
+        else:
+            found.append(path)
+    return found
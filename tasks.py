@@ -0,0 +1,242 @@
+"""
+tasks.py — A work queue in jobs_seen.db, so several local processes can
+share one run.
+
+    python main.py --queue            # queue this run's fetches, work, finish the run
+    python main.py --worker           # in more terminals: help until the queue is empty
+    python check_expired.py --queue   # the same for expiry checks
+
+Each row of the tasks table is one unit of work:
+
+- board     one brand ATS board (brand_scrapers.board_keys(), with FETCH_BRAND_ATS)
+- jsearch   one JSearch query
+- teamwork  the TeamWork Online crawl
+- expiry    a batch of EXPIRY_BATCH jobs to check with liveness.check()
+
+A worker claims the oldest open task with a lease of TASK_LEASE_SECONDS and
+renews it from a heartbeat thread while the task runs. If the worker dies
+or stalls, its lease runs out and the next claim takes the task over; after
+TASK_MAX_ATTEMPTS claims the task is failed. A task that raises goes back
+to pending the same way, keeping what it had done so far.
+
+Workers mark new jobs seen, and queue their Slack messages, in the shared
+DB as they go. mark_job_seen() only queues a job it actually inserted, so
+two workers (or a task run twice) never notify the same job twice. The
+process that queued the run collects the task results and does the rest:
+all_jobs.json, the dashboard and Slack delivery.
+
+That process keeps the run's heartbeat fresh (task_runs) while it works.
+Workers only take tasks of live runs; once a run's heartbeat is older than
+TASK_LEASE_SECONDS its open tasks are failed, and the next run of the same
+kind collects whatever the abandoned run's tasks had already done.
+
+Rate limits and circuit breakers are per process, so N workers can hit a
+shared host (JSearch especially) up to N times as hard.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import api_fetcher
+import db
+import liveness
+from brand_scrapers import board_keys, fetch_all_brand_jobs
+from config import EXPIRY_BATCH, FETCH_BRAND_ATS, TASK_LEASE_SECONDS, TASK_MAX_ATTEMPTS
+from job import Job
+from scraper import scrape_all_companies
+
+logger = logging.getLogger(__name__)
+
+# How often an idle worker looks again while other workers hold leases
+POLL_SECONDS = 2
+
+
+class _OneKey:
+    """Stands in for a sharding.Shard that owns a single board / query key."""
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def owns(self, key: str) -> bool:
+        return key == self.key
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def new_run_id(kind: str) -> str:
+    """A fresh ID for one queued run; task IDs are "{run_id}:{key}"."""
+    return f"{kind}-{uuid.uuid4().hex[:12]}"
+
+
+@contextmanager
+def queued_run(kind: str):
+    """
+    Start a run of `kind` ("fetch", "expiry") and keep its heartbeat fresh
+    until the block exits. Yields the run ID.
+    """
+    run_id = new_run_id(kind)
+    db.start_run(run_id, kind, worker_id())
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(TASK_LEASE_SECONDS / 3):
+            db.beat_run(run_id)
+
+    beat = threading.Thread(target=heartbeat, name="run-heartbeat", daemon=True)
+    beat.start()
+    try:
+        yield run_id
+    finally:
+        stop.set()
+        beat.join()
+
+
+def collect(run_id: str, kind: str) -> list[dict]:
+    """
+    Results of `run_id`'s tasks, plus those of abandoned runs of the same
+    kind, which are then marked collected along with this one.
+    """
+    results = []
+    for abandoned in db.abandoned_runs(kind, TASK_LEASE_SECONDS):
+        logger.info("Collecting results of abandoned run %s", abandoned)
+        results.extend(db.task_results(abandoned))
+        db.finish_run(abandoned)
+    results.extend(db.task_results(run_id))
+    db.finish_run(run_id)
+    return results
+
+
+# ── Queueing ──────────────────────────────────────────────────────────────────
+
+def queue_fetches(run_id: str, delta: bool, notify: bool) -> int:
+    """Queue one task per brand board (with FETCH_BRAND_ATS), JSearch query and TeamWork Online."""
+    payload = {"delta": delta, "notify": notify}
+    tasks = []
+    if FETCH_BRAND_ATS:
+        tasks += [(key, "board", {**payload, "key": key}) for key in board_keys()]
+    if api_fetcher.JSEARCH_API_KEY:
+        tasks += [
+            (f"jsearch:{query}", "jsearch", {**payload, "key": f"jsearch:{query}"})
+            for query in api_fetcher.JSEARCH_QUERIES
+        ]
+    tasks.append(("teamwork_online", "teamwork", {**payload, "key": "teamwork_online"}))
+    db.add_tasks(run_id, tasks)
+    return len(tasks)
+
+
+def queue_expiry_checks(run_id: str, jobs: list[Job], batch: int = EXPIRY_BATCH) -> int:
+    """Queue `jobs` for liveness checks, `batch` per task."""
+    tasks = [
+        (f"expiry:{i // batch}", "expiry", {"jobs": [job.to_dict() for job in jobs[i: i + batch]]})
+        for i in range(0, len(jobs), batch)
+    ]
+    db.add_tasks(run_id, tasks)
+    return len(tasks)
+
+
+# ── Running ───────────────────────────────────────────────────────────────────
+
+def _fetch_task(payload: dict, result: dict):
+    """Run one fetcher for one key; mark what's new seen. Fills in new jobs + listed IDs."""
+    one = _OneKey(payload["key"])
+    kind = payload["key"].partition(":")[0]
+    if kind == "jsearch":
+        jobs = api_fetcher.fetch_all_api_jobs(shard=one)
+    elif kind == "teamwork_online":
+        jobs = scrape_all_companies(shard=one)
+    else:
+        jobs = fetch_all_brand_jobs(delta=payload["delta"], shard=one)
+
+    new_jobs = result["new_jobs"] = []
+    listed_ids = result["listed_ids"] = []
+    for job in jobs:
+        listed_ids.append(job.id)
+        if db.is_new_job(job.id) and db.mark_job_seen(job, notify=payload["notify"]):
+            new_jobs.append(job.to_dict())
+            logger.info("  NEW  [%s] %s @ %s", job.source, job.title, job.company)
+
+
+def _expiry_task(payload: dict, result: dict):
+    """Check a batch of jobs and record the outcome. Fills in the checked + expired IDs."""
+    results = []
+    expired = []
+    for job in map(Job.from_dict, payload["jobs"]):
+        status = liveness.check(job)
+        results.append((job.id, status))
+        if status == "expired":
+            expired.append(job.id)
+            logger.info("  EXPIRED  [%s] %s @ %s", job.source, job.title, job.company)
+    db.record_checks(results)
+    db.mark_expired(expired)
+    result["checked"] = [job_id for job_id, _ in results]
+    result["expired"] = expired
+
+
+RUNNERS = {
+    "board": _fetch_task,
+    "jsearch": _fetch_task,
+    "teamwork": _fetch_task,
+    "expiry": _expiry_task,
+}
+
+
+def _run(task, owner: str) -> bool:
+    """Run one claimed task, renewing its lease until it finishes. True if it succeeded."""
+    task_id = task["task_id"]
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(TASK_LEASE_SECONDS / 3):
+            if not db.renew_lease(task_id, owner, TASK_LEASE_SECONDS):
+                logger.warning("Lost the lease on %s - another worker may take it over", task_id)
+                return
+
+    beat = threading.Thread(target=heartbeat, name="task-heartbeat", daemon=True)
+    beat.start()
+    # Filled in by the runner as it goes, so a failure keeps what was done:
+    # jobs it already marked seen must still reach all_jobs.json
+    result = {}
+    try:
+        RUNNERS[task["kind"]](json.loads(task["payload"]), result)
+    except Exception as e:
+        logger.exception("Task %s failed (attempt %d)", task_id, task["attempts"])
+        db.fail_task(task_id, owner, repr(e), TASK_MAX_ATTEMPTS, result)
+        return False
+    finally:
+        stop.set()
+        beat.join()
+    if not db.complete_task(task_id, owner, result):
+        logger.warning("Task %s was taken over while it ran; results were merged", task_id)
+    return True
+
+
+def work(run_id: str | None = None, owner: str | None = None) -> int:
+    """
+    Claim and run tasks (of `run_id`, if given, else of any live run) until
+    none are left open. While other workers still hold leases this waits
+    rather than returning, since their tasks come back if they die. Returns
+    the tasks completed here.
+    """
+    owner = owner or worker_id()
+    completed = 0
+    while True:
+        task = db.claim_task(
+            owner, TASK_LEASE_SECONDS, TASK_MAX_ATTEMPTS, TASK_LEASE_SECONDS, run_id
+        )
+        if task is None:
+            counts = db.task_counts(run_id)
+            if not counts.get("pending") and not counts.get("leased"):
+                return completed
+            time.sleep(POLL_SECONDS)
+            continue
+        logger.info("Task %s (%s)", task["task_id"], owner)
+        completed += _run(task, owner)
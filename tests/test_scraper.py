@@ -0,0 +1,46 @@
+import db
+import scraper
+from filters import FilterSpec
+
+
+def _cards(page):
+    return [
+        (f"Analyst {page}-{n}", f"/jobs/{page}-{n}", "Club", "Denver, CO")
+        for n in range(5)
+    ]
+
+
+def _crawl(monkeypatch, seen, spec):
+    fetched = []
+
+    def fetch(page):
+        fetched.append(page)
+        return _cards(page)
+
+    monkeypatch.setattr(scraper, "_fetch_teamwork_cards", fetch)
+    monkeypatch.setattr(db, "seen_ids", lambda ids: {i for i in ids if i in seen})
+    jobs = list(scraper.scrape_teamwork_online(max_pages=10, concurrency=1, spec=spec))
+    return jobs, fetched
+
+
+def _ids(page):
+    _, jobs = scraper._teamwork_page_jobs(_cards(page), FilterSpec())
+    return {job.id for job in jobs}
+
+
+def test_stops_on_seen_page_when_keyword_filters_everything(monkeypatch):
+    jobs, fetched = _crawl(monkeypatch, _ids(1), FilterSpec(["no such title"]))
+    assert jobs == []
+    assert fetched == [1]
+
+
+def test_keeps_going_while_nothing_was_seen(monkeypatch):
+    jobs, fetched = _crawl(monkeypatch, set(), FilterSpec(["no such title"]))
+    assert jobs == []
+    assert fetched == list(range(1, 11))
+
+
+def test_stops_after_new_jobs(monkeypatch):
+    jobs, fetched = _crawl(monkeypatch, _ids(2), FilterSpec())
+    assert {job.id for job in jobs} == _ids(1)
+    assert fetched == [1, 2]